@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:02:37 2026
+
+@author: beacr
+"""
+
+# Architecture of the subnetworks. An Architecture lists the widths of the hidden layers, the activation
+# ("tanh", "sin", "softplus", "swish"), whether layers of equal width are residual (h + act(W h + b)) and the
+# number of random Fourier features [sin(2 pi x B), cos(2 pi x B)] the input is embedded into, B ~ N(0, sigma^2)
+# drawn once from `seed`. The base classes take it as arch= (an Architecture or the dict of its arguments);
+# without it the subnetworks are N tanh layers of width 256. Every activation also provides its first and
+# second derivative, used by the forward laplacian (forward_laplacian in pdebase.py).
+#
+#   npde = ProblemPeak_BD(64, 0, 50, arch=Architecture([64, 64], "sin", fourier=32, sigma=4.0))
+#   npde = HighDimensionSmooth(64, 0, 5, arch={"widths": [128] * 4, "activation": "swish", "residual": True})
+
+import numpy as np
+import tensorflow as tf
+
+#activation derivatives: value, first and second derivative at z
+def _tanh(z):
+    a = tf.tanh(z)
+    s = 1 - a ** 2
+    return a, s, -2 * a * s
+
+def _sin(z):
+    a = tf.sin(z)
+    return a, tf.cos(z), -a
+
+def _softplus(z):
+    s = tf.sigmoid(z)
+    return tf.nn.softplus(z), s, s * (1 - s)
+
+def _swish(z):
+    s = tf.sigmoid(z)
+    ds = s * (1 - s)
+    return z * s, s + z * ds, ds * (2 + z * (1 - 2 * s))
+
+# name: (activation, derivatives)
+ACTIVATIONS = {"tanh": (tf.nn.tanh, _tanh),
+               "sin": (tf.sin, _sin),
+               "softplus": (tf.nn.softplus, _softplus),
+               "swish": (lambda z: z * tf.sigmoid(z), _swish)}
+
+
+class Architecture:
+    def __init__(self, widths=(256, 256, 256), activation="tanh", residual=False, fourier=0, sigma=1.0, seed=0):
+        if activation not in ACTIVATIONS:
+            raise ValueError("unknown activation: {}".format(activation))
+        self.widths = [int(w) for w in widths]
+        self.activation = activation
+        self.residual = residual   # skip connection around the hidden layers whose input has the same width
+        self.fourier = fourier     # number of Fourier features, 0: the input is used as it is
+        self.sigma = sigma         # scale of the frequencies
+        self.seed = seed
+
+    @property
+    def N(self):
+        return len(self.widths)
+
+    def fn(self, z):
+        return ACTIVATIONS[self.activation][0](z)
+
+    def derivatives(self, z):
+        return ACTIVATIONS[self.activation][1](z)
+
+    #options: arguments of the architecture (graph cache key)
+    def options(self):
+        return {"widths": self.widths, "activation": self.activation, "residual": self.residual,
+                "fourier": self.fourier, "sigma": self.sigma, "seed": self.seed}
+
+    def __repr__(self):
+        return "Architecture({})".format(", ".join("{}={!r}".format(k, v) for k, v in self.options().items()))
+
+    #sizes: input size of every layer and output size, for d-dimensional points
+    def sizes(self, d):
+        return [2 * self.fourier if self.fourier else d] + self.widths + [1]
+
+    #skip: whether hidden layer i is residual
+    def skip(self, i, d):
+        sizes = self.sizes(d)
+        return self.residual and i > 0 and sizes[i] == sizes[i + 1]
+
+    #frequencies: 2 pi B, (d, fourier)
+    def frequencies(self, d):
+        return 2 * np.pi * self.sigma * np.random.RandomState(self.seed).randn(d, self.fourier)
+
+    #embed: Fourier features of x, or x
+    def embed(self, x):
+        if not self.fourier:
+            return x
+        phi = tf.matmul(x, tf.constant(self.frequencies(x.get_shape().as_list()[1]), x.dtype))
+        return tf.concat([tf.sin(phi), tf.cos(phi)], axis=1)
+
+    #embed_forward: Fourier features of x with their gradient (batch, d, 2*fourier) and laplacian;
+    #               gradient and laplacian are None for the identity embedding
+    def embed_forward(self, x):
+        if not self.fourier:
+            return x, None, None
+        F = self.frequencies(x.get_shape().as_list()[1])
+        phi = tf.matmul(x, tf.constant(F, x.dtype))
+        s, c = tf.sin(phi), tf.cos(phi)
+        Ft = tf.constant(F[np.newaxis], x.dtype)
+        norm = tf.constant((F ** 2).sum(axis=0), x.dtype)
+        J = tf.concat([c[:, tf.newaxis, :] * Ft, -s[:, tf.newaxis, :] * Ft], axis=2)
+        L = tf.concat([-s * norm, -c * norm], axis=1)
+        return tf.concat([s, c], axis=1), J, L
+
+#as_architecture: Architecture of arch (Architecture, dict of arguments or None: N tanh layers of width 256)
+def as_architecture(arch, N):
+    if arch is None:
+        return Architecture([256] * N)
+    if isinstance(arch, dict):
+        return Architecture(**arch)
+    return arch
+
+#dense_network: network of arch on x with layers prefix+"dense{i}" and prefix+"last", output (batch,)
+def dense_network(x, arch, prefix, reuse=False):
+    d = x.get_shape().as_list()[1]
+    h = arch.embed(x)
+    for i, width in enumerate(arch.widths):
+        z = tf.layers.dense(h, width, activation=arch.fn, name=prefix + "dense{}".format(i), reuse=reuse)
+        h = h + z if arch.skip(i, d) else z
+    h = tf.layers.dense(h, 1, activation=None, name=prefix + "last", reuse=reuse)
+    return tf.squeeze(h, axis=1)
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:56:30 2026
+
+@author: beacr
+"""
+
+# Benchmark suite of the problem classes: for every class of problems.py and every (N, d) case it measures
+# the graph build time, the latency percentiles of train(), the peak RSS and the L2 error after a fixed
+# number of steps, each case in its own process. The results of a run are written to
+# <out>/<commit>.json with the commit, the machine and the library versions, and two runs are compared
+# case by case to catch regressions.
+#
+#   python bench.py run [--classes Problem1_BD HighDimensionSmooth] [--layers 1 3] [--dims 2 5 10] [--steps 200]
+#   python bench.py compare bench/<old commit>.json bench/<new commit>.json [--tolerance 0.1]
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue as queues
+import resource
+import subprocess
+import time
+
+import numpy as np
+
+CLASSES = ("Problem1", "ProblemPeak", "ProblemBLSingularity",
+           "Problem1_BD", "ProblemPeak_BD", "ProblemBLSingularity_BD",
+           "HighDimensionSmooth", "HighDimensionPeak", "HighDimensionSingularity")
+
+# metrics compared by compare(), all lower is better
+METRICS = ("build", "p50", "p90", "p99", "rss", "l2")
+
+#peak_rss: peak resident memory of the process in MB
+def peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+#time_steps: train() latencies of `steps` steps after one warm-up step
+def time_steps(npde, sess, steps):
+    npde.train(sess, 0)
+    times = np.empty(steps)
+    for i in range(steps):
+        t0 = time.time()
+        npde.train(sess, i + 1)
+        times[i] = time.time() - t0
+    return times
+
+#grid_l2: rms error on the reference grid of the NNPDE classes (which have no l2 metric)
+def grid_l2(npde, sess):
+    uh = sess.run(npde.u, feed_dict={npde.x: npde.refnX})
+    return np.sqrt(np.mean((uh - npde.exactsol(npde.X, npde.Y).reshape(-1)) ** 2))
+
+#run_isolated: fn(*args) in a fresh spawned process (own graph and peak RSS); exceptions are returned, as is
+#              a RuntimeError if the process dies without a result (killed when out of memory, crashed) and a
+#              TimeoutError if it runs longer than `timeout` seconds
+def run_isolated(fn, args, timeout=None, poll=1.0):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    p = ctx.Process(target=_worker, args=(fn, args, queue))
+    p.start()
+    t0 = time.time()
+    while True:
+        try:
+            res = queue.get(timeout=poll)
+            break
+        except queues.Empty:
+            pass
+        if not p.is_alive():
+            try:
+                res = queue.get(timeout=poll)       # put just before the process exited
+            except queues.Empty:
+                res = RuntimeError("worker died with exit code {}{}".format(
+                    p.exitcode, " (signal {})".format(-p.exitcode) if p.exitcode < 0 else ""))
+            break
+        if timeout is not None and time.time() - t0 > timeout:
+            p.terminate()
+            res = TimeoutError("worker still running after {:g}s".format(timeout))
+            break
+    p.join()
+    return res
+
+def _worker(fn, args, queue):
+    try:
+        queue.put(fn(*args))
+    except Exception as e:
+        queue.put(e)
+
+#run_case: measures one (problem, N, d) case; d is the refn of the 2D problems
+def run_case(problem, N, d, steps, batch_size, seed, options):
+    import tensorflow as tf
+    import problems
+
+    tf.set_random_seed(seed)
+    np.random.seed(seed)
+    cls = getattr(problems, problem)
+    if issubclass(cls, (problems.NNPDE2, problems.NNPDE_ND)):
+        options = dict({"l2_every": steps + 1}, **options)     # rl2 only in the untimed warm-up step
+    rss0 = peak_rss()
+    t0 = time.time()
+    npde = cls(batch_size, N, d, **options)
+    build = time.time() - t0
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        times = time_steps(npde, sess, steps)
+        l2 = npde.l2metric.evaluate(sess, npde.u, npde.x) if hasattr(npde, "l2metric") else grid_l2(npde, sess)
+    if hasattr(npde, "sampler"):
+        npde.sampler.close()
+    p50, p90, p99 = np.percentile(times, [50, 90, 99])
+    return {"build": build, "p50": p50, "p90": p90, "p99": p99, "rss": peak_rss(), "rss_graph": peak_rss() - rss0,
+            "l2": float(l2), "loss": float(npde.rloss[-1])}
+
+#cases: (problem, N, d) of a run; the 2D problems use d = refn only once
+def cases(classes, layers, dims, refn=50):
+    res = []
+    for problem in classes:
+        for N in layers:
+            for d in (dims if problem.startswith("HighDimension") else [refn]):
+                res.append((problem, N, d))
+    return res
+
+def _git(*args):
+    try:
+        return subprocess.check_output(("git",) + args, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+#environment: commit and machine of a run
+def environment():
+    env = {"commit": _git("rev-parse", "HEAD") or "unknown",
+           "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+           "date": time.strftime("%Y-%m-%d %H:%M:%S"), "machine": platform.node(),
+           "processor": platform.processor(), "cpus": os.cpu_count(), "python": platform.python_version(),
+           "numpy": np.__version__}
+    try:
+        import tensorflow as tf
+        env["tensorflow"] = tf.__version__
+    except ImportError:
+        env["tensorflow"] = None
+    return env
+
+#run: all the cases, written to <out>/<commit>[-dirty].json; returns the file name
+#     a case failing, dying or running longer than `timeout` seconds is recorded with its error
+def run(classes, layers, dims, steps=200, batch_size=64, seed=0, options=None, out="bench", verbose=True,
+        timeout=None):
+    env = environment()     # before tensorflow is imported in this process
+    env.update(steps=steps, batch_size=batch_size, seed=seed, options=options or {})
+    results = []
+    for problem, N, d in cases(classes, layers, dims):
+        res = run_isolated(run_case, (problem, N, d, steps, batch_size, seed, options or {}), timeout)
+        record = {"problem": problem, "N": N, "d": d}
+        if isinstance(res, Exception):
+            record["error"] = repr(res)
+        else:
+            record.update(res)
+        results.append(record)
+        if verbose:
+            print(format_record(record))
+    os.makedirs(out, exist_ok=True)
+    filename = os.path.join(out, env["commit"][:12] + ("-dirty" if env["dirty"] else "") + ".json")
+    with open(filename, "w") as file:
+        json.dump({"environment": env, "results": results}, file, indent=1)
+    return filename
+
+def format_record(r):
+    head = "{:>24} {:>3} {:>4}".format(r["problem"], r["N"], r["d"])
+    if "error" in r:
+        return head + " failed: " + r["error"]
+    return head + " {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.1f} {:>10.3e}".format(
+        r["build"], 1e3 * r["p50"], 1e3 * r["p90"], 1e3 * r["p99"], r["rss"], r["l2"])
+
+#load: results of a run, by case
+def load(filename):
+    with open(filename) as file:
+        data = json.load(file)
+    return data["environment"], {(r["problem"], r["N"], r["d"]): r for r in data["results"]}
+
+#compare: ratio new/old of every metric of the common cases; a ratio above 1 + tolerance is a regression
+#         (for l2, whose run-to-run spread is larger, above 1 + l2_tolerance); returns the regressions
+def compare(old, new, tolerance=0.1, l2_tolerance=0.5, verbose=True):
+    env0, res0 = load(old)
+    env1, res1 = load(new)
+    regressions = []
+    if verbose:
+        print("{} -> {}".format(env0["commit"][:12], env1["commit"][:12]))
+        print("{:>24} {:>3} {:>4} ".format("problem", "N", "d") + " ".join("{:>8}".format(m) for m in METRICS))
+    for key in sorted(set(res0) & set(res1)):
+        r0, r1 = res0[key], res1[key]
+        if "error" in r0 or "error" in r1:
+            if verbose:
+                print("{:>24} {:>3} {:>4} failed".format(*key))
+            if "error" in r1 and "error" not in r0:
+                regressions.append((key, "error"))
+            continue
+        ratios = {m: r1[m] / r0[m] if r0[m] > 0 else np.inf for m in METRICS}
+        for m, ratio in ratios.items():
+            if ratio > 1 + (l2_tolerance if m == "l2" else tolerance):
+                regressions.append((key, m))
+        if verbose:
+            print("{:>24} {:>3} {:>4} ".format(*key) + " ".join(
+                "{:>7.2f}{}".format(ratios[m], "!" if (key, m) in regressions else " ") for m in METRICS))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("run")
+    p.add_argument("--classes", nargs="+", default=list(CLASSES))
+    p.add_argument("--layers", type=int, nargs="+", default=[1, 3])
+    p.add_argument("--dims", type=int, nargs="+", default=[2, 5, 10])
+    p.add_argument("--steps", type=int, default=200)
+    p.add_argument("--batch-size", type=int, default=64)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", default="bench")
+    p.add_argument("--timeout", type=float, default=None)
+    p = sub.add_parser("compare")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--tolerance", type=float, default=0.1)
+    p.add_argument("--l2-tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        print("{:>24} {:>3} {:>4} {:>8} {:>8} {:>8} {:>8} {:>8} {:>10}".format(
+            "problem", "N", "d", "build[s]", "p50[ms]", "p90[ms]", "p99[ms]", "rss[MB]", "rl2"))
+        print(run(args.classes, args.layers, args.dims, args.steps, args.batch_size, args.seed, out=args.out,
+                  timeout=args.timeout))
+    elif args.command == "compare":
+        regressions = compare(args.old, args.new, args.tolerance, args.l2_tolerance)
+        print("{} regressions".format(len(regressions)))
+        raise SystemExit(1 if regressions else 0)
+    else:
+        parser.print_help()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:40 2026
+
+@author: beacr
+"""
+
+# Benchmark of the laplacian methods of compute_laplacian on HighDimensionSmooth:
+# graph build time, time per training step and peak memory for d = 2, 5, 10, 50, 100.
+# Every (method, d) pair runs in its own process so that the peak RSS is not shared.
+#
+#   python bench_laplacian.py [--steps 50] [--layers 3] [--dims 2 5 10 50 100]
+
+import argparse
+import time
+
+import numpy as np
+
+from bench import peak_rss, run_isolated, time_steps
+
+
+def run(method, d, layers, steps, batch_size, probes):
+    import tensorflow as tf
+    from problems import HighDimensionSmooth
+
+    rss0 = peak_rss()
+    t0 = time.time()
+    npde = HighDimensionSmooth(batch_size, layers, d, laplacian=method, probes=probes, l2_every=steps + 1)
+    build = time.time() - t0
+
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        times = time_steps(npde, sess, steps)
+    return build, np.median(times), np.percentile(times, 90), peak_rss() - rss0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--layers", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--probes", type=int, default=4)
+    parser.add_argument("--dims", type=int, nargs="+", default=[2, 5, 10, 50, 100])
+    parser.add_argument("--methods", nargs="+", default=["reverse", "batched", "hutchinson", "forward"])
+    args = parser.parse_args()
+
+    print("{:>10} {:>5} {:>10} {:>12} {:>12} {:>10}".format(
+        "method", "d", "build[s]", "step p50[ms]", "step p90[ms]", "mem[MB]"))
+    for d in args.dims:
+        for method in args.methods:
+            res = run_isolated(run, (method, d, args.layers, args.steps, args.batch_size, args.probes))
+            if isinstance(res, Exception):
+                print("{:>10} {:>5} failed: {}".format(method, d, res))
+                continue
+            build, p50, p90, mem = res
+            print("{:>10} {:>5} {:>10.2f} {:>12.2f} {:>12.2f} {:>10.1f}".format(
+                method, d, build, 1e3 * p50, 1e3 * p90, mem))
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:37:21 2026
+
+@author: beacr
+"""
+
+# Benchmark of the precision policies (PRECISIONS in pdebase.py) on Problem1_BD, ProblemPeak_BD and
+# HighDimensionSmooth: time per training step and L2 error after the same number of steps, with the same
+# seed. Every (problem, precision) pair runs in its own process.
+#
+#   python bench_precision.py [--steps 2000] [--layers 3] [--dim 5]
+
+import argparse
+
+import numpy as np
+
+from bench import run_isolated, time_steps
+
+PROBLEMS = ("Problem1_BD", "ProblemPeak_BD", "HighDimensionSmooth")
+
+
+def run(problem, precision, layers, dim, steps, batch_size, seed):
+    import tensorflow as tf
+    import problems
+
+    tf.set_random_seed(seed)
+    np.random.seed(seed)
+    # third argument: refn of the 2D problems, dimension of HighDimensionSmooth
+    third = dim if problem.startswith("HighDimension") else 50
+    npde = getattr(problems, problem)(batch_size, layers, third, precision=precision, l2_every=steps + 1)
+
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        times = time_steps(npde, sess, steps)
+        l2 = npde.l2metric.evaluate(sess, npde.u, npde.x)
+    npde.sampler.close()
+    return np.median(times), np.percentile(times, 90), l2, npde.rloss[-1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--layers", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--problems", nargs="+", default=list(PROBLEMS))
+    parser.add_argument("--precisions", nargs="+", default=["float64", "float32", "mixed"])
+    args = parser.parse_args()
+
+    print("{:>20} {:>8} {:>12} {:>12} {:>12} {:>12}".format(
+        "problem", "dtype", "step p50[ms]", "step p90[ms]", "rl2", "loss"))
+    for problem in args.problems:
+        for precision in args.precisions:
+            res = run_isolated(run, (problem, precision, args.layers, args.dim, args.steps,
+                                     args.batch_size, args.seed))
+            if isinstance(res, Exception):
+                print("{:>20} {:>8} failed: {}".format(problem, precision, res))
+                continue
+            p50, p90, l2, loss = res
+            print("{:>20} {:>8} {:>12.2f} {:>12.2f} {:>12.3e} {:>12.3e}".format(
+                problem, precision, 1e3 * p50, 1e3 * p90, l2, loss))
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:34:02 2026
+
+@author: beacr
+"""
+
+# Checkpoints of a training run: all the global variables (weights of the "boundary" and "inner" scopes,
+# slots and beta powers of both Adam optimizers), the numpy and sampler RNG states, the rl2 cadence, the
+# rbloss/rloss/rl2 histories and the state of the training controller (control.py) if there is one. The values
+# are fetched in the training thread with a single sess.run and written to <path>/ckpt-<iteration>.npz by a
+# background thread.
+#
+#   ckpt = Checkpointer(npde, path, every=1000, controller=ctl)
+#   with tf.Session() as sess:
+#       sess.run(npde.init)
+#       for i in range(resume(npde, sess, path, ctl), iterations):
+#           npde.train(sess, i)
+#           stop = ctl.step(sess, i)
+#           ckpt.step(sess, i)       # after ctl.step: the checkpoint holds its state of iteration i
+#           if stop:
+#               break
+#   ckpt.close()
+
+import glob
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+HISTORIES = ("rbloss", "rloss", "rl2", "rl2_iter", "rl2_ci", "rbloss_members", "rloss_members", "rl2_members")
+
+#checkpoints: checkpoint files in path, sorted by iteration
+def checkpoints(path):
+    files = glob.glob(os.path.join(path, "ckpt-*.npz"))
+    return sorted(files, key=lambda f: int(os.path.basename(f)[5:-4]))
+
+
+class Checkpointer:
+    def __init__(self, npde, path, every=1000, keep=2, controller=None):
+        self.npde = npde
+        self.controller = controller
+        self.path = path
+        self.every = every
+        self.keep = keep
+        self.vars = tf.global_variables()
+        os.makedirs(path, exist_ok=True)
+
+        # one pending snapshot at most: a newer one replaces it if the writer is still busy
+        self.queue = queue.Queue(maxsize=1)
+        self.error = None       # exception that stopped the writer thread
+        self.thread = threading.Thread(target=self._write, daemon=True)
+        self.thread.start()
+
+    #step: checkpoint of iteration i when due; returns True if one was taken
+    def step(self, sess, i):
+        if (i + 1) % self.every == 0:
+            self.save(sess, i)
+            return True
+        return False
+
+    def save(self, sess, i):
+        self._check()
+        state = {"iteration": np.array(i)}
+        for v, value in zip(self.vars, sess.run(self.vars)):
+            state["var:" + v.name] = value
+        for name in HISTORIES:
+            if hasattr(self.npde, name):
+                state["hist:" + name] = np.array(getattr(self.npde, name))
+        _, keys, pos, has_gauss, cached = np.random.get_state()
+        state.update(rng_keys=keys, rng_pos=np.array(pos), rng_has_gauss=np.array(has_gauss),
+                     rng_cached=np.array(cached))
+        if hasattr(self.npde, "l2metric"):      # NNPDE has neither an l2 metric nor a sampler
+            state["l2_calls"] = np.array(self.npde.l2metric.calls)
+        if hasattr(self.npde, "sampler"):
+            state["sampler"] = np.array(json.dumps(self.npde.sampler.get_state()))
+        if self.controller is not None:
+            state["controller"] = np.array(json.dumps(self.controller.get_state(), default=float))
+        while True:
+            try:
+                self.queue.put_nowait(state)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _write(self):
+        try:
+            while True:
+                state = self.queue.get()
+                if state is None:
+                    return
+                name = "ckpt-{}.npz".format(int(state["iteration"]))
+                tmp = os.path.join(self.path, "tmp-" + name)
+                np.savez(tmp, **state)
+                os.replace(tmp, os.path.join(self.path, name))     # never leave a truncated checkpoint
+                for old in checkpoints(self.path)[:-self.keep]:
+                    os.remove(old)
+        except Exception as e:
+            self.error = e
+
+    #_check: raises the error of the writer thread, if it failed
+    def _check(self):
+        if self.error is not None:
+            raise RuntimeError("checkpoint writer failed: {!r}".format(self.error)) from self.error
+
+    #close: waits at most `timeout` seconds for the pending checkpoint to be written
+    def close(self, timeout=60):
+        while self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=1)
+                break
+            except queue.Full:      # pending checkpoint not taken yet
+                pass
+        self.thread.join(timeout)
+        self._check()
+        if self.thread.is_alive():
+            raise RuntimeError("checkpoint writer still busy after {}s".format(timeout))
+
+
+#resume: restores the last checkpoint of path (if any) into the session, the problem and the controller,
+#        returns the iteration to continue from
+def resume(npde, sess, path, controller=None):
+    files = checkpoints(path) if os.path.isdir(path) else []
+    if not files:
+        return 0
+    state = np.load(files[-1])
+    for v in tf.global_variables():
+        v.load(state["var:" + v.name], sess)
+    for name in HISTORIES:
+        if "hist:" + name in state:
+            setattr(npde, name, [tuple(h) if np.ndim(h) else h.item() for h in state["hist:" + name]])
+    np.random.set_state(("MT19937", state["rng_keys"], int(state["rng_pos"]),
+                         int(state["rng_has_gauss"]), float(state["rng_cached"])))
+    if "l2_calls" in state:
+        npde.l2metric.calls = int(state["l2_calls"])
+    if "sampler" in state:
+        npde.sampler.set_state(json.loads(str(state["sampler"])))
+    if controller is not None and "controller" in state:
+        controller.set_state(json.loads(str(state["controller"])))
+    return int(state["iteration"]) + 1
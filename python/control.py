@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:48:13 2026
+
+@author: beacr
+"""
+
+# Training controller: learning-rate schedule and stopping rules of a training loop, for every problem class.
+# The learning rate is the non-trainable variable npde.lr shared by the optimizers of the problem, loaded
+# with lr.load only when it changes (it is also saved and restored by checkpoint.py). The monitored value
+# is an exponential moving average of the last loss ("loss", "bloss") or the last rl2 ("rl2"). The state of
+# the controller and of its schedule (get_state/set_state) is checkpointed with the run, so that a resumed
+# run continues with the same moving average, patience counters and elapsed wall time.
+#
+#   ctl = Controller(npde, PlateauLR(patience=500), target_l2=1e-3, patience=2000, budget=3600)
+#   for i in range(20000):
+#       npde.train(sess, i)
+#       if ctl.step(sess, i):
+#           break
+#   print(ctl.reason)
+
+import time
+
+import numpy as np
+
+
+#StepLR: lr * gamma^(i // every)
+class StepLR:
+    def __init__(self, lr=0.001, every=5000, gamma=0.5):
+        self.lr = lr
+        self.every = every
+        self.gamma = gamma
+
+    def __call__(self, i, value, lr):
+        return self.lr * self.gamma ** (i // self.every)
+
+
+#CosineLR: linear warm-up for `warmup` iterations, then cosine decay from lr to lr_min at `iterations`
+class CosineLR:
+    def __init__(self, lr=0.001, iterations=20000, lr_min=0.0, warmup=0):
+        self.lr = lr
+        self.iterations = iterations
+        self.lr_min = lr_min
+        self.warmup = warmup
+
+    def __call__(self, i, value, lr):
+        if i < self.warmup:
+            return self.lr * (i + 1) / self.warmup
+        t = min(1.0, (i - self.warmup) / max(1, self.iterations - self.warmup))
+        return self.lr_min + 0.5 * (self.lr - self.lr_min) * (1 + np.cos(np.pi * t))
+
+
+#PlateauLR: lr multiplied by `factor` (down to lr_min) when the monitored value has not improved by a
+#           relative `threshold` for `patience` iterations
+class PlateauLR:
+    def __init__(self, factor=0.5, patience=500, threshold=1e-3, lr_min=1e-6):
+        self.factor = factor
+        self.patience = patience
+        self.threshold = threshold
+        self.lr_min = lr_min
+        self.best = np.inf
+        self.wait = 0
+
+    def __call__(self, i, value, lr):
+        if value < self.best * (1 - self.threshold):
+            self.best = value
+            self.wait = 0
+        else:
+            self.wait += 1
+            if self.wait >= self.patience:
+                self.wait = 0
+                return max(lr * self.factor, self.lr_min)
+        return lr
+
+
+#Controller: applies the schedule after every training step and decides when to stop:
+#  - "target": the last rl2 is <= target_l2
+#  - "plateau": the monitored value has not improved by a relative min_delta for `patience` iterations
+#  - "diverged": the last loss is not finite or above `diverge`
+#  - "budget": `budget` seconds of wall time since the first step
+class Controller:
+    def __init__(self, npde, schedule=None, monitor="loss", smooth=0.99, target_l2=None, patience=None,
+                 min_delta=1e-3, budget=None, diverge=1e10, verbose=True):
+        self.npde = npde
+        self.schedule = schedule
+        self.monitor = monitor
+        self.smooth = smooth    # weight of the moving average
+        self.target_l2 = target_l2
+        self.patience = patience
+        self.min_delta = min_delta
+        self.budget = budget
+        self.diverge = diverge
+        self.verbose = verbose
+
+        self.value = None       # moving average of the monitored value
+        self.best = np.inf
+        self.wait = 0
+        self.lr = None
+        self.t0 = None
+        self.reason = None      # why training stopped (None while running)
+        self.rlr = []           # learning rate at every step
+
+    #get_state: state of the controller and of its schedule, for checkpoint.py
+    def get_state(self):
+        return {"value": self.value, "best": self.best, "wait": self.wait, "lr": self.lr, "rlr": self.rlr,
+                "elapsed": None if self.t0 is None else time.time() - self.t0,
+                "schedule": None if self.schedule is None else dict(vars(self.schedule))}
+
+    #set_state: restores a state of get_state; the wall-time budget counts the elapsed time of the saved run
+    def set_state(self, state):
+        self.value, self.best, self.wait, self.lr = state["value"], state["best"], state["wait"], state["lr"]
+        self.rlr = list(state["rlr"])
+        self.t0 = None if state["elapsed"] is None else time.time() - state["elapsed"]
+        if self.schedule is not None and state["schedule"] is not None:
+            vars(self.schedule).update(state["schedule"])
+
+    def _update(self):
+        npde = self.npde
+        if self.monitor == "rl2":
+            if npde.rl2:
+                self.value = npde.rl2[-1]
+            return
+        last = getattr(npde, "r" + self.monitor)[-1]
+        self.value = last if self.value is None else self.smooth * self.value + (1 - self.smooth) * last
+
+    def _stop(self, reason, i):
+        self.reason = reason
+        if self.verbose:
+            print("Iteration={}: stopped ({})".format(i, reason))
+        return True
+
+    #step: to call after npde.train(sess, i); returns True when training should stop
+    def step(self, sess, i):
+        if self.t0 is None:
+            self.t0 = time.time()
+            self.lr = float(sess.run(self.npde.lr))    # possibly restored from a checkpoint
+        self._update()
+
+        if self.schedule is not None and self.value is not None:
+            lr = self.schedule(i, self.value, self.lr)
+            if lr != self.lr:
+                self.npde.lr.load(lr, sess)
+                self.lr = lr
+        self.rlr.append(self.lr)
+
+        loss = self.npde.rloss[-1]
+        if not np.isfinite(loss) or loss > self.diverge:
+            return self._stop("diverged", i)
+        if self.target_l2 is not None and self.npde.rl2 and self.npde.rl2[-1] <= self.target_l2:
+            return self._stop("target", i)
+        if self.patience is not None and self.value is not None:
+            if self.value < self.best * (1 - self.min_delta):
+                self.best = self.value
+                self.wait = 0
+            else:
+                self.wait += 1
+                if self.wait >= self.patience:
+                    return self._stop("plateau", i)
+        if self.budget is not None and time.time() - self.t0 >= self.budget:
+            return self._stop("budget", i)
+        return False
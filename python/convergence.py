@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:05:44 2026
+
+@author: beacr
+"""
+
+# Convergence study of the finite elements against the networks (the Python C_convergence_test): the FEM
+# solves of every refinement level and the trainings of the network problem at every wall-time budget run in
+# a process pool; all are scored with the L2 and H1-seminorm errors of errors.py against the same exact
+# solution (the networks on the mesh of eval_level). The records go to <out>/convergence.json, the table with
+# the observed rates (FEM: in h, networks: in 1/time) is printed and error versus dofs (trainable
+# parameters for the networks) and versus wall time is drawn in <out>/convergence.png.
+#
+#   records = run_study("peak", levels=range(2, 11), budgets=[60, 300, 1200], out="conv/peak")
+#
+#   python convergence.py peak --levels 2 3 4 5 6 7 8 9 10 --budgets 60 300 1200 --workers 2
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+import traceback
+
+import numpy as np
+
+from errors import fem_errors
+from fem import Problem, TESTS, peak, solve, structured_mesh
+from sweep import _init_worker
+
+# study: (network problem class, FEM problem with the same exact solution, -delta(u) = f)
+STUDIES = {
+    "smooth": ("Problem1_BD", TESTS["Test1"]),
+    "peak": ("ProblemPeak_BD",
+             Problem("Peak", peak, lambda x, y: (-2000 * (x - 0.5) * peak(x, y), -2000 * (y - 0.5) * peak(x, y)),
+                     lambda x, y: (4000 - 4e6 * ((x - 0.5) ** 2 + (y - 0.5) ** 2)) * peak(x, y))),
+    "singularity": ("ProblemBLSingularity_BD", TESTS["Test3"]),
+}
+
+#run_fem: FEM solve of refinement level `level` (2^level intervals per side) and its errors
+def run_fem(study, level, method="cg"):
+    problem = STUDIES[study][1]
+    t0 = time.time()
+    mesh = structured_mesh(2 ** level, problem.domain)
+    uh, info = solve(problem, mesh, method)
+    wall = time.time() - t0
+    l2, h1 = fem_errors(mesh, problem, uh)
+    return {"kind": "fem", "level": level, "h": mesh.h, "dofs": mesh.ndof, "time": wall,
+            "iterations": info["iterations"], "l2": l2, "h1": h1}
+
+#run_network: trains the network problem of the study for `budget` seconds (or `iterations` steps) and
+#             scores it on the mesh of eval_level
+def run_network(study, budget, layers=3, batch_size=64, seed=0, eval_level=8, iterations=None, options=None):
+    import tensorflow as tf
+    import problems
+    from control import Controller
+    from errors import network_errors
+
+    tf.reset_default_graph()
+    tf.set_random_seed(seed)
+    np.random.seed(seed)
+    cls, problem = STUDIES[study]
+    # refn only sizes the reference grid of the rl2 history, which is not needed here
+    npde = getattr(problems, cls)(batch_size, layers, 10, **dict({"l2_every": 10 ** 9}, **(options or {})))
+    ctl = Controller(npde, budget=budget, verbose=False)
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        t0 = time.time()
+        i = 0
+        while iterations is None or i < iterations:
+            npde.train(sess, i)
+            i += 1
+            if ctl.step(sess, i - 1):
+                break
+        wall = time.time() - t0
+        l2, h1 = network_errors(npde, sess, structured_mesh(2 ** eval_level, problem.domain), problem)
+        dofs = int(sum(np.prod(v.get_shape().as_list()) for v in tf.trainable_variables()))
+    npde.sampler.close()
+    return {"kind": "network", "budget": budget, "layers": layers, "dofs": dofs, "time": wall, "iterations": i,
+            "l2": l2, "h1": h1}
+
+def _run(task):
+    kind, args = task
+    try:
+        return (run_fem if kind == "fem" else run_network)(*args)
+    except Exception:
+        return {"kind": kind, "args": list(args), "error": traceback.format_exc()}
+
+#rates: observed rates log(e_k/e_{k-1}) / log(x_k/x_{k-1}) of the errors e in x, as C_convergence_test
+#       (first entry None)
+def rates(x, e):
+    x, e = np.asarray(x, dtype=float), np.asarray(e, dtype=float)
+    return [None] + list(np.diff(np.log(e)) / np.diff(np.log(x)))
+
+#run_study: FEM levels and network budgets of a study in `workers` processes of `threads` threads each;
+#           returns the records (FEM by level, then networks by budget) with their rates, also written to
+#           <out>/convergence.json
+def run_study(study, levels=range(2, 11), budgets=(60, 300, 1200), layers=3, batch_size=64, seed=0,
+              eval_level=8, workers=None, threads=1, options=None, out="convergence", method="cg"):
+    tasks = [("fem", (study, level, method)) for level in levels]
+    tasks += [("network", (study, budget, layers, batch_size, seed, eval_level, None, options))
+              for budget in budgets]
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads)
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=(threads,),
+                  maxtasksperchild=1) as pool:
+        records = pool.map(_run, tasks, chunksize=1)
+    for r in records:
+        if "error" in r:
+            print("{} {} failed:\n{}".format(r["kind"], r["args"], r["error"]))
+    fem = [r for r in records if r["kind"] == "fem" and "error" not in r]
+    net = [r for r in records if r["kind"] == "network" and "error" not in r]
+    for group, x in ((fem, lambda r: r["h"]), (net, lambda r: 1 / r["time"])):
+        for norm in ("l2", "h1"):
+            for r, rate in zip(group, rates([x(r) for r in group], [r[norm] for r in group])):
+                r["rate_" + norm] = rate
+    os.makedirs(out, exist_ok=True)
+    with open(os.path.join(out, "convergence.json"), "w") as file:
+        json.dump({"study": study, "records": records}, file, indent=1)
+    return records
+
+def _rate(r):
+    return "{:>7}".format("-") if r is None else "{:>7.2f}".format(r)
+
+#table: the records of a study as text
+def table(records):
+    lines = ["{:>8} {:>7} {:>10} {:>10} {:>10} {:>7} {:>10} {:>7}".format(
+        "kind", "level", "dofs", "time[s]", "L2", "rate", "H1 semi", "rate")]
+    for r in records:
+        if "error" in r:
+            continue
+        lines.append("{:>8} {:>7} {:>10} {:>10.2f} {:>10.3e} {} {:>10.3e} {}".format(
+            r["kind"], r["level"] if r["kind"] == "fem" else "{:g}s".format(r["budget"]), r["dofs"], r["time"],
+            r["l2"], _rate(r.get("rate_l2")), r["h1"], _rate(r.get("rate_h1"))))
+    return "\n".join(lines)
+
+#plot: L2 and H1-seminorm errors versus dofs and versus wall time, into filename
+def plot(records, filename, title=""):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(12, 5))
+    FigureCanvasAgg(fig)
+    for k, x in enumerate(("dofs", "time")):
+        ax = fig.add_subplot(1, 2, k + 1)
+        for kind, marker in (("fem", "o"), ("network", "s")):
+            group = [r for r in records if r["kind"] == kind and "error" not in r]
+            if not group:
+                continue
+            for norm, style in (("l2", "-"), ("h1", "--")):
+                ax.loglog([r[x] for r in group], [r[norm] for r in group], style + marker,
+                          label="{} {}".format(kind, "L2" if norm == "l2" else "H1 semi"))
+        ax.set_xlabel("degrees of freedom" if x == "dofs" else "wall time [s]")
+        ax.set_ylabel("error")
+        ax.grid(True, which="both", alpha=0.3)
+        ax.legend()
+    fig.suptitle(title)
+    fig.savefig(filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("study", choices=sorted(STUDIES))
+    parser.add_argument("--levels", type=int, nargs="+", default=list(range(2, 11)))
+    parser.add_argument("--budgets", type=float, nargs="*", default=[60, 300, 1200])
+    parser.add_argument("--layers", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--eval-level", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    out = args.out or os.path.join("convergence", args.study)
+    records = run_study(args.study, args.levels, args.budgets, args.layers, args.batch_size, args.seed,
+                        args.eval_level, args.workers, args.threads, out=out)
+    print(table(records))
+    plot(records, os.path.join(out, "convergence.png"), args.study)
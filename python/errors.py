@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:31:52 2026
+
+@author: beacr
+"""
+
+# L2 and H1-seminorm errors on a triangular mesh (fem.Mesh), the vectorized C_error_L2_H1: the squared errors
+# at the quadrature nodes of a block of `chunk` elements are computed in one NumPy pass and summed, so memory
+# stays bounded by the block size at any mesh size. The approximate solution is either a P1 vector (fem_errors)
+# or a trained network of NNPDE2 / NNPDE (network_errors), whose gradient is taken with compute_dx/compute_dy;
+# the exact solution and gradient come from a fem.Problem or, for the networks, from the problem class itself.
+#
+#   mesh = structured_mesh(2 ** 10)
+#   uh, info = solve(TESTS["Test1"], mesh)
+#   l2, h1 = fem_errors(mesh, TESTS["Test1"], uh)
+#   l2, h1 = network_errors(npde, sess, mesh)
+
+import numpy as np
+
+from fem import TRIANGLE_RULES, shape
+
+#error_norms: L2 and H1-seminorm errors of `field` against exact / grad; field(x, y, elements, grads) returns
+#             the approximate value and gradient (du/dx, du/dy) at the points (nc, q) of a block of elements
+def error_norms(mesh, exact, grad, field, rule=7, chunk=65536):
+    nodes, weights = TRIANGLE_RULES[rule]
+    l2 = h1 = 0.0
+    for start in range(0, mesh.ne, chunk):
+        elements = slice(start, min(start + chunk, mesh.ne))
+        area, grads = mesh.geometry(elements)
+        x, y = mesh.points(nodes, elements)
+        u, ux, uy = field(x, y, elements, grads)
+        gx, gy = grad(x, y)
+        dx = 2 * area[:, None] * weights          # quadrature weights of the physical elements
+        l2 += np.sum((u - exact(x, y)) ** 2 * dx)
+        h1 += np.sum(((ux - gx) ** 2 + (uy - gy) ** 2) * dx)
+    return np.sqrt(l2), np.sqrt(h1)
+
+#fem_errors: errors of the P1 solution uh (nodal values) of problem
+def fem_errors(mesh, problem, uh, rule=7, chunk=65536):
+    S = shape(TRIANGLE_RULES[rule][0]).T
+    def field(x, y, elements, grads):
+        U = uh[mesh.tria[elements]]                               # (nc, 3)
+        g = np.einsum("ei,eid->ed", U, grads)                     # constant on every element
+        return U @ S, np.broadcast_to(g[:, :1], x.shape), np.broadcast_to(g[:, 1:], x.shape)
+    return error_norms(mesh, problem.exact, problem.grad, field, rule, chunk)
+
+#gradient_tensors: du/dx, du/dy of npde.u (built once per problem, on the placeholder npde.x)
+def gradient_tensors(npde):
+    if getattr(npde, "grad_u", None) is None:
+        from pdebase import compute_dx, compute_dy
+        npde.grad_u = (compute_dx(npde.u, npde.x), compute_dy(npde.u, npde.x))
+    return npde.grad_u
+
+#exact_gradient_tensors: gradient of npde.tfexactsol on npde.x (built once per problem)
+def exact_gradient_tensors(npde):
+    if getattr(npde, "grad_exact", None) is None:
+        import tensorflow as tf
+        g = tf.gradients(npde.tfexactsol(npde.x), npde.x)[0]
+        npde.grad_exact = (g[:, 0], g[:, 1])
+    return npde.grad_exact
+
+#network_errors: errors of the network of a 2D problem (NNPDE2, NNPDE), evaluated on blocks of `chunk`
+#                elements; without `problem` (a fem.Problem) the exact solution is npde.exactsol and its gradient
+#                that of npde.tfexactsol
+def network_errors(npde, sess, mesh, problem=None, rule=7, chunk=4096):
+    if getattr(npde, "ensemble", 1) > 1:
+        raise ValueError("network_errors evaluates a single network (ensemble=1)")
+    if problem is None and not hasattr(npde, "tfexactsol"):
+        raise ValueError("{} has no tfexactsol: pass the problem with the exact gradient".format(type(npde).__name__))
+    dtype = npde.dtype.as_numpy_dtype
+    ux, uy = gradient_tensors(npde)
+    fetches = [npde.u, ux, uy]
+    if problem is None:
+        fetches += list(exact_gradient_tensors(npde))
+    exact = {}      # exact gradient of the current block, computed together with the network
+
+    def field(x, y, elements, grads):
+        X = np.column_stack([x.ravel(), y.ravel()]).astype(dtype)
+        res = [r.reshape(x.shape) for r in sess.run(fetches, feed_dict={npde.x: X})]
+        exact["grad"] = res[3:]
+        return res[:3]
+
+    if problem is None:
+        return error_norms(mesh, npde.exactsol, lambda x, y: exact["grad"], field, rule, chunk)
+    return error_norms(mesh, problem.exact, problem.grad, field, rule, chunk)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:02:51 2026
+
+@author: beacr
+"""
+
+# Frozen inference models. export() writes the trained weights of the "boundary" and "inner" subnetworks (the
+# single network of NNPDE), the Fourier frequencies and the layout of the architecture to a .npz file; load()
+# reads it back into a FrozenModel, a pure-NumPy evaluator of u = bsubnetwork(x) + B(x)*subnetwork(x)
+# (u = A(x) + B(x)*subnetwork(x) for NNPDE) that needs neither TensorFlow nor the problem class. The NumPy
+# lifts A, B are looked up in LIFTS by the exact class name, never that of a base class whose A, B a subclass
+# may override (register() adds new problems and subclasses). freeze() writes the same function as a
+# TensorFlow GraphDef with the weights as constants and no training ops, for TF serving.
+#
+#   export(npde, sess, "peak.npz")
+#   model = load("peak.npz")
+#   u = model(points)
+#
+#   python export.py peak.npz points.npy u.npy
+
+import json
+import sys
+
+import numpy as np
+
+def _bubble2(x):
+    return x[:, 0] * (1 - x[:, 0]) * x[:, 1] * (1 - x[:, 1])
+
+def _bubble(x):
+    return np.prod(x * (1 - x), axis=1)
+
+def _sinsin(x):
+    return np.sin(np.pi * x[:, 0]) * np.sin(np.pi * x[:, 1])
+
+# class name: (A, B) in NumPy, A None for the classes with a boundary subnetwork
+LIFTS = {
+    "Problem1": (lambda x: np.zeros(len(x)), _bubble2),
+    "ProblemPeak": (lambda x: np.exp(-1000 * ((x[:, 0] - 0.5) ** 2 + (x[:, 1] - 0.5) ** 2)) + _sinsin(x), _bubble2),
+    "ProblemBLSingularity": (lambda x: x[:, 0] ** 0.6 + _sinsin(x), _bubble2),
+    "NNPDE2": (None, _bubble2),
+    "Problem1_BD": (None, _bubble2),
+    "ProblemPeak_BD": (None, _bubble2),
+    "ProblemBLSingularity_BD": (None, _bubble2),
+    "HighDimensionSmooth": (None, _bubble),
+    "HighDimensionPeak": (None, _bubble),
+    "HighDimensionSingularity": (None, _bubble),
+}
+
+#register: NumPy lifts of a problem class (A=None for NNPDE2/NNPDE_ND problems)
+def register(name, B, A=None):
+    LIFTS[name] = (A, B)
+
+# NumPy versions of the activations of architecture.py
+ACTIVATIONS = {"tanh": np.tanh,
+               "sin": np.sin,
+               "softplus": lambda z: np.logaddexp(0, z),
+               "swish": lambda z: 0.5 * z * (1 + np.tanh(0.5 * z))}
+
+#_lift: the registered class of npde; the class itself must be registered, a subclass may override A or B
+def _lift(npde):
+    name = type(npde).__name__
+    if name not in LIFTS:
+        raise ValueError("no NumPy lift registered for {}: use export.register".format(name))
+    return name
+
+#_networks: (name, variable scope, layer prefix) of the subnetworks of npde
+def _networks(npde):
+    if hasattr(npde, "bsubnetwork"):
+        return [("inner", "inner/", ""), ("boundary", "boundary/", "b")]
+    return [("inner", "", "")]
+
+#export: weights and layout of the trained npde to the .npz file path
+def export(npde, sess, path):
+    import tensorflow as tf
+
+    if getattr(npde, "ensemble", 1) > 1:
+        raise ValueError("export needs a single network (ensemble=1)")
+    arch = npde.arch
+    d = getattr(npde, "d", 2)
+    variables = {v.name: v for v in tf.global_variables()}
+    names = {}
+    for net, scope, prefix in _networks(npde):
+        for i in range(arch.N + 1):
+            layer = scope + prefix + ("dense{}".format(i) if i < arch.N else "last")
+            names["{}.W{}".format(net, i)] = variables[layer + "/kernel:0"]
+            names["{}.b{}".format(net, i)] = variables[layer + "/bias:0"]
+    arrays = dict(zip(names, sess.run(list(names.values()))))
+    if arch.fourier:
+        arrays["fourier"] = arch.frequencies(d)
+    meta = {"class": type(npde).__name__, "lift": _lift(npde), "d": d, "layers": arch.N,
+            "activation": arch.activation, "skip": [arch.skip(i, d) for i in range(arch.N)],
+            "networks": [net for net, _, _ in _networks(npde)]}
+    np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+
+
+class FrozenModel:
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.arrays = arrays
+        self.d = meta["d"]
+        self.activation = ACTIVATIONS[meta["activation"]]
+        self.A, self.B = LIFTS[meta["lift"]]
+        self.fourier = arrays.get("fourier")
+
+    #network: output (n,) of the subnetwork net at the points x (n, d)
+    def network(self, net, x):
+        h = x
+        if self.fourier is not None:
+            phi = x @ self.fourier
+            h = np.concatenate([np.sin(phi), np.cos(phi)], axis=1)
+        a = self.arrays
+        for i, skip in enumerate(self.meta["skip"]):
+            z = self.activation(h @ a["{}.W{}".format(net, i)] + a["{}.b{}".format(net, i)])
+            h = h + z if skip else z
+        N = self.meta["layers"]
+        return (h @ a["{}.W{}".format(net, N)] + a["{}.b{}".format(net, N)])[:, 0]
+
+    #u: approximate solution at the points x (n, d)
+    def u(self, x):
+        inner = self.network("inner", x)
+        if self.A is None:
+            return self.network("boundary", x) + self.B(x) * inner
+        return self.A(x) + self.B(x) * inner
+
+    #__call__: u in chunks of `chunk` points, to bound the memory of the hidden layers
+    def __call__(self, x, chunk=65536):
+        if len(x.shape) != 2 or x.shape[1] != self.d:
+            raise ValueError("expected points of shape (n, {}), got {}".format(self.d, x.shape))
+        dtype = self.arrays["inner.W0"].dtype
+        res = np.empty(len(x), dtype)
+        for k in range(0, len(x), chunk):       # x may be a memmap, converted chunk by chunk
+            res[k:k + chunk] = self.u(np.asarray(x[k:k + chunk], dtype))
+        return res
+
+#load: FrozenModel of an exported .npz file
+def load(path):
+    with np.load(path) as data:
+        arrays = {k: data[k] for k in data.files if k != "meta"}
+        meta = json.loads(str(data["meta"]))
+    return FrozenModel(meta, arrays)
+
+#freeze: u of npde as a TensorFlow GraphDef at path (.pb), weights folded into constants and only the ops
+#        reachable from u kept; the input and output tensor names go to path + ".json"
+def freeze(npde, sess, path):
+    import tensorflow as tf
+
+    u = tf.identity(npde.u, name="frozen_u")
+    graph_def = tf.graph_util.convert_variables_to_constants(sess, sess.graph.as_graph_def(), [u.op.name])
+    graph_def = tf.graph_util.remove_training_nodes(graph_def, protected_nodes=[u.op.name])
+    with tf.gfile.GFile(path, "wb") as file:
+        file.write(graph_def.SerializeToString())
+    with open(path + ".json", "w") as file:
+        json.dump({"x": npde.x.name, "u": u.name, "d": getattr(npde, "d", 2)}, file)
+
+#load_frozen: graph, input placeholder and output tensor of a frozen GraphDef
+def load_frozen(path):
+    import tensorflow as tf
+
+    with open(path + ".json") as file:
+        names = json.load(file)
+    graph_def = tf.GraphDef()
+    with tf.gfile.GFile(path, "rb") as file:
+        graph_def.ParseFromString(file.read())
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(graph_def, name="")
+    return graph, graph.get_tensor_by_name(names["x"]), graph.get_tensor_by_name(names["u"])
+
+
+if __name__ == "__main__":
+    model = load(sys.argv[1])
+    np.save(sys.argv[3], model(np.load(sys.argv[2], mmap_mode="r")))
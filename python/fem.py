@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:40:15 2026
+
+@author: beacr
+"""
+
+# P1 finite elements for -mu*delta(u) + beta.grad(u) + sigma*u = f on a rectangle with Dirichlet data u = g,
+# the Python counterpart of matlab/CG_FEM. The mesh is the structured triangulation of C_create_mesh ('TS':
+# n x n squares cut along the anti-diagonal, n = 2^nRefinement); stiffness, mass and advection matrices and
+# the load vector are computed for all the elements at once and assembled COO -> CSR, the Dirichlet nodes are
+# eliminated through the lifting u_g (C_bound_cond2D) and the interior system is solved by conjugate gradients
+# preconditioned with a geometric multigrid V-cycle (about 10 iterations at any level) or by a sparse direct
+# factorization. TESTS holds the three test cases of C_dati.m.
+#
+#   mesh = structured_mesh(2 ** 10)          # 1050625 dofs
+#   uh, info = solve(TESTS["Test2"], mesh)
+#
+#   python fem.py Test2 --level 10 [--method direct]
+
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+# quadrature rules on the reference triangle (0,0), (1,0), (0,1): nodes (q, 2) and weights (q,), summing to
+# the reference area 1/2; all nodes are interior, so singular data on the boundary (Test3) can be integrated
+TRIANGLE_RULES = {
+    1: (np.array([[1 / 3, 1 / 3]]), np.array([0.5])),
+    3: (np.array([[1 / 6, 1 / 6], [2 / 3, 1 / 6], [1 / 6, 2 / 3]]), np.full(3, 1 / 6)),
+    7: (np.array([[1 / 3, 1 / 3],
+                  [0.059715871789770, 0.470142064105115], [0.470142064105115, 0.059715871789770],
+                  [0.470142064105115, 0.470142064105115],
+                  [0.797426985353087, 0.101286507323456], [0.101286507323456, 0.797426985353087],
+                  [0.101286507323456, 0.101286507323456]]),
+        0.5 * np.array([0.225] + [0.132394152788506] * 3 + [0.125939180544827] * 3)),
+}
+
+#shape: values (q, 3) of the P1 basis functions at the reference nodes (q, 2)
+def shape(nodes):
+    return np.column_stack([1 - nodes[:, 0] - nodes[:, 1], nodes[:, 0], nodes[:, 1]])
+
+
+class Mesh:
+    def __init__(self, coord, tria, boundary, h, n=None, interior=None):
+        self.coord = coord          # (nv, 2) vertices = dofs
+        self.tria = tria            # (ne, 3) vertices of every element, counterclockwise
+        self.boundary = boundary    # boundary vertices
+        self.h = h                  # mesh size
+        self.n = n                  # intervals per side of a structured mesh (None: unstructured)
+        self.interior = np.setdiff1d(np.arange(len(coord)), boundary) if interior is None else interior
+
+    @property
+    def ndof(self):
+        return len(self.coord)
+
+    @property
+    def ne(self):
+        return len(self.tria)
+
+    #geometry: area (ne,) and gradients of the basis functions (ne, 3, 2) of every element,
+    #          grad(phi_i) = (y_j - y_k, x_k - x_j) / (2*area) for (i, j, k) cyclic
+    def geometry(self, elements=slice(None)):
+        tria = self.tria[elements]
+        x = self.coord[tria, 0]
+        y = self.coord[tria, 1]
+        dx = np.roll(x, -2, axis=1) - np.roll(x, -1, axis=1)     # x_k - x_j
+        dy = np.roll(y, -1, axis=1) - np.roll(y, -2, axis=1)     # y_j - y_k
+        det = dx[:, 2] * dy[:, 1] - dx[:, 1] * dy[:, 2]          # twice the signed area
+        grads = np.stack([dy, dx], axis=2) / det[:, None, None]
+        return 0.5 * np.abs(det), grads
+
+    #points: physical coordinates x, y (ne, q) of the reference nodes (q, 2) on every element
+    def points(self, nodes, elements=slice(None)):
+        S = shape(nodes).T
+        tria = self.tria[elements]
+        return self.coord[tria, 0] @ S, self.coord[tria, 1] @ S
+
+#structured_mesh: n x n squares of the rectangle domain, each cut into two triangles along the anti-diagonal
+#                 as the 'TS' mesh of C_create_mesh
+def structured_mesh(n, domain=((0.0, 1.0), (0.0, 1.0))):
+    (x0, x1), (y0, y1) = domain
+    x = np.linspace(x0, x1, n + 1)
+    y = np.linspace(y0, y1, n + 1)
+    X, Y = np.meshgrid(x, y)
+    coord = np.column_stack([X.ravel(), Y.ravel()])
+    idx = np.arange((n + 1) ** 2, dtype=np.int32).reshape(n + 1, n + 1)
+    sw, se, nw, ne = idx[:-1, :-1].ravel(), idx[:-1, 1:].ravel(), idx[1:, :-1].ravel(), idx[1:, 1:].ravel()
+    tria = np.concatenate([np.column_stack([sw, se, nw]), np.column_stack([se, ne, nw])])
+    boundary = np.unique(np.concatenate([idx[0], idx[-1], idx[:, 0], idx[:, -1]]))
+    return Mesh(coord, tria, boundary, max(x1 - x0, y1 - y0) / n, n, structured_interior(n))
+
+#structured_interior: interior vertices of the structured mesh with n intervals per side
+def structured_interior(n):
+    return np.arange((n + 1) ** 2).reshape(n + 1, n + 1)[1:-1, 1:-1].ravel()
+
+#prolongation: P1 interpolation from the structured mesh with n/2 intervals per side onto the one with n
+#              (the coarse mesh refined regularly, C_refine_mesh): coarse vertices are kept and every fine
+#              vertex on a coarse edge (horizontal, vertical or anti-diagonal) is the mean of its endpoints
+def prolongation(n):
+    nc = n // 2
+    i, j = np.divmod(np.arange((n + 1) ** 2), n + 1)
+    i0, i1, j0, j1 = i // 2, (i + 1) // 2, j // 2, (j + 1) // 2
+    diagonal = (i % 2 == 1) & (j % 2 == 1)
+    ja, jb = np.where(diagonal, j1, j0), np.where(diagonal, j0, j1)
+    rows = np.concatenate([i * (n + 1) + j] * 2)
+    cols = np.concatenate([i0 * (nc + 1) + ja, i1 * (nc + 1) + jb])
+    return sp.coo_matrix((np.full(len(rows), 0.5), (rows, cols)), shape=((n + 1) ** 2, (nc + 1) ** 2)).tocsr()
+
+
+#Multigrid: geometric multigrid V-cycle for the interior system of a structured mesh, used as preconditioner
+#           of cg: Galerkin coarse matrices P^T A P down to `coarsest` intervals per side (sparse LU there),
+#           `smooth` damped Jacobi sweeps before and after the coarse correction (symmetric cycle)
+class Multigrid:
+    def __init__(self, A, n, smooth=2, omega=0.8, coarsest=8):
+        if n is None or n % 2:
+            raise ValueError("multigrid needs a structured mesh with an even number of intervals per side")
+        self.smooth = smooth
+        self.omega = omega
+        self.A = [A.tocsr()]
+        self.P = []
+        interior = structured_interior(n)
+        while n % 2 == 0 and n > coarsest:
+            coarse = structured_interior(n // 2)
+            P = prolongation(n)[interior][:, coarse]
+            self.P.append(P)
+            self.A.append((P.T @ self.A[-1] @ P).tocsr())
+            n, interior = n // 2, coarse
+        self.Dinv = [1 / A.diagonal() for A in self.A]
+        self.lu = spla.splu(self.A[-1].tocsc())
+
+    @property
+    def levels(self):
+        return len(self.A)
+
+    def vcycle(self, r, level=0):
+        if level == len(self.P):
+            return self.lu.solve(r)
+        A, Dinv, w = self.A[level], self.Dinv[level], self.omega
+        x = w * Dinv * r
+        for k in range(self.smooth - 1):
+            x += w * Dinv * (r - A @ x)
+        x += self.P[level] @ self.vcycle(self.P[level].T @ (r - A @ x), level + 1)
+        for k in range(self.smooth):
+            x += w * Dinv * (r - A @ x)
+        return x
+
+    def operator(self):
+        return spla.LinearOperator(self.A[0].shape, self.vcycle)
+
+
+#Problem: data of -mu*delta(u) + beta.grad(u) + sigma*u = f with the exact solution (Dirichlet datum) and its
+#         gradient, as the Dati struct of C_dati.m; the functions take and return arrays of any shape
+class Problem:
+    def __init__(self, name, exact, grad, force, mu=1.0, sigma=0.0, beta=(0.0, 0.0), domain=((0.0, 1.0), (0.0, 1.0))):
+        self.name = name
+        self.exact = exact
+        self.grad = grad        # (x, y) -> (du/dx, du/dy)
+        self.force = force
+        self.mu = mu
+        self.sigma = sigma
+        self.beta = np.asarray(beta, dtype=float)
+        self.domain = domain
+
+    @property
+    def symmetric(self):
+        return not self.beta.any()
+
+#peak: the Gaussian peak of the peak problems, exp(-1000 |(x, y) - (0.5, 0.5)|^2)
+def peak(x, y):
+    return np.exp(-1000 * (x - 0.5) ** 2 - 1000 * (y - 0.5) ** 2)
+
+# the test cases of C_dati.m; the forcing terms and gradients are those of the exact solutions for
+# -delta(u) = f (the MATLAB data of Test2 and Test3 carry the opposite sign of the forcing term)
+TESTS = {
+    "Test1": Problem("Test1",
+                     lambda x, y: np.sin(np.pi * x) * np.sin(np.pi * y),
+                     lambda x, y: (np.pi * np.cos(np.pi * x) * np.sin(np.pi * y),
+                                   np.pi * np.sin(np.pi * x) * np.cos(np.pi * y)),
+                     lambda x, y: 2 * np.pi ** 2 * np.sin(np.pi * x) * np.sin(np.pi * y)),
+    "Test2": Problem("Test2",
+                     lambda x, y: peak(x, y) + np.sin(np.pi * x),
+                     lambda x, y: (-2000 * (x - 0.5) * peak(x, y) + np.pi * np.cos(np.pi * x),
+                                   -2000 * (y - 0.5) * peak(x, y)),
+                     lambda x, y: (4000 - 4e6 * ((x - 0.5) ** 2 + (y - 0.5) ** 2)) * peak(x, y)
+                                  + np.pi ** 2 * np.sin(np.pi * x)),
+    "Test3": Problem("Test3",
+                     lambda x, y: y ** 0.6,
+                     lambda x, y: (0 * x, 0.6 * y ** -0.4),
+                     lambda x, y: 0.24 * y ** -1.4),
+}
+TESTS.update(smooth=TESTS["Test1"], peak=TESTS["Test2"], singularity=TESTS["Test3"])
+
+
+#assemble: global matrix of the bilinear form and load vector (no boundary conditions), as C_matrix2D;
+#          rule: number of quadrature nodes of the load (TRIANGLE_RULES)
+def assemble(mesh, problem, rule=7):
+    area, grads = mesh.geometry()
+    local = problem.mu * area[:, None, None] * np.matmul(grads, grads.transpose(0, 2, 1))
+    if problem.sigma:
+        local += problem.sigma * area[:, None, None] * (np.ones((3, 3)) + np.eye(3)) / 12
+    if problem.beta.any():
+        # int phi_i beta.grad(phi_j) = area/3 * beta.grad(phi_j)
+        local += (area / 3)[:, None, None] * np.einsum("d,ejd->ej", problem.beta, grads)[:, None, :]
+    rows = np.broadcast_to(mesh.tria[:, :, None], local.shape).ravel()
+    cols = np.broadcast_to(mesh.tria[:, None, :], local.shape).ravel()
+    A = sp.coo_matrix((local.ravel(), (rows, cols)), shape=(mesh.ndof, mesh.ndof)).tocsr()
+
+    nodes, weights = TRIANGLE_RULES[rule]
+    fq = problem.force(*mesh.points(nodes))                                 # (ne, q)
+    load = 2 * area[:, None] * (fq @ (weights[:, None] * shape(nodes)))
+    b = np.bincount(mesh.tria.ravel(), weights=load.ravel(), minlength=mesh.ndof)
+    return A, b
+
+#dirichlet: interior system A_II u_I = b_I - A_IB g_B of the lifting u_g = g on the boundary nodes
+#           (C_bound_cond2D, with the boundary rows and columns removed instead of replaced by the identity)
+def dirichlet(A, b, mesh, problem):
+    ug = np.zeros(mesh.ndof)
+    xb, yb = mesh.coord[mesh.boundary].T
+    ug[mesh.boundary] = problem.exact(xb, yb)
+    rhs = (b - A @ ug)[mesh.interior]
+    return A[mesh.interior][:, mesh.interior], rhs, ug
+
+#preconditioner: LinearOperator of "multigrid" (Multigrid, structured meshes) or "jacobi" (diagonal) for the
+#                interior matrix A of mesh, None for "none"
+def preconditioner(A, mesh, precond="multigrid"):
+    if precond == "none":
+        return None
+    if precond == "jacobi":
+        inv = 1 / A.diagonal()
+        return spla.LinearOperator(A.shape, lambda r: inv * r)
+    if precond == "multigrid":
+        return Multigrid(A, mesh.n).operator()
+    raise ValueError("unknown preconditioner: {}".format(precond))
+
+#solve: P1 solution (nodal values) of problem on mesh and info (dofs, iterations, assembly and solve times);
+#       method "cg" (preconditioned conjugate gradients, symmetric problems only) or "direct" (sparse LU,
+#       the A\b of C_main2D, slow beyond ~10^5 dofs)
+def solve(problem, mesh, method="cg", precond="multigrid", tol=1e-10, maxiter=None, rule=7):
+    if method not in ("direct", "cg"):
+        raise ValueError("unknown method: {}".format(method))
+    if method == "cg" and not problem.symmetric:
+        raise ValueError("method=\"cg\" needs a symmetric problem (beta = 0)")
+    info = {"ndof": mesh.ndof, "ne": mesh.ne, "h": mesh.h, "method": method}
+    t0 = time.time()
+    A, b = assemble(mesh, problem, rule)
+    AII, rhs, uh = dirichlet(A, b, mesh, problem)
+    info["assembly"] = time.time() - t0
+
+    t0 = time.time()
+    if method == "direct":
+        uI = spla.spsolve(AII.tocsc(), rhs)
+        info["iterations"] = 0
+    else:
+        iterations = [0]
+        def count(xk):
+            iterations[0] += 1
+        M = preconditioner(AII, mesh, precond)
+        info["precond"] = precond
+        uI, status = spla.cg(AII, rhs, rtol=tol, maxiter=maxiter, M=M, callback=count)
+        if status > 0:
+            raise RuntimeError("cg did not converge in {} iterations".format(status))
+        info["iterations"] = iterations[0]
+    uh[mesh.interior] = uI
+    info["solve"] = time.time() - t0
+    return uh, info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("test", choices=sorted(TESTS))
+    parser.add_argument("--level", type=int, default=6)     # 2^level intervals per side
+    parser.add_argument("--method", default="cg", choices=["cg", "direct"])
+    parser.add_argument("--precond", default="multigrid", choices=["multigrid", "jacobi", "none"])
+    parser.add_argument("--tol", type=float, default=1e-10)
+    args = parser.parse_args()
+
+    problem = TESTS[args.test]
+    t0 = time.time()
+    mesh = structured_mesh(2 ** args.level, problem.domain)
+    t_mesh = time.time() - t0
+    uh, info = solve(problem, mesh, args.method, args.precond, args.tol)
+    x, y = mesh.coord.T
+    print("{}: {} dofs, mesh {:.2f}s, assembly {:.2f}s, solve {:.2f}s ({} iterations), max nodal error {:.3e}".format(
+        problem.name, info["ndof"], t_mesh, info["assembly"], info["solve"], info["iterations"],
+        np.abs(uh - problem.exact(x, y)).max()))
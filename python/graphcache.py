@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:12:03 2026
+
+@author: beacr
+"""
+
+# Cache of built graphs. Building a problem (subnetworks, nested tf.gradients laplacian, optimizers) is
+# the slow part of its construction; with cache=<folder> the base classes export the built graph as a
+# meta graph <folder>/<key>.meta together with a manifest <key>.json of the tensor and op names of the
+# problem attributes, and later constructions with the same key import it instead of building it.
+# The key hashes the class, the graph options (N, d, laplacian, precision, ...), the graph-level seed
+# (tf.set_random_seed, which fixes the initial weights), the TensorFlow version and the source files of the
+# class and its bases and of the modules in MODULES, so that editing a problem or the code building its
+# networks, metrics and samplers invalidates its graphs.
+# The graph is only cached and restored in an empty default graph (tf.reset_default_graph() first); the
+# optimizer objects (optimizer1, optimizer2) are not available on restored problems, their ops are. The
+# restored variables are registered in the variable store, so that tensors built later on the problem
+# with tf.get_variable(reuse=True) (forward_laplacian, inference fields, the adaptive sampler) share them.
+#
+#   npde = HighDimensionPeak(64, 3, 10, cache="graphs")
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+
+import tensorflow as tf
+from tensorflow.python.ops import variable_scope
+
+# problem attributes holding graph elements
+GRAPH_ATTRS = ("x", "x_b", "u", "u_b", "bloss", "loss", "ploss", "lr", "opt", "opt1", "opt2", "init",
+               "fused_ops", "fused_l2", "joint_ops", "balance", "bweight", "blosses", "losses", "lr_scale")
+
+# modules building parts of the graph besides the problem classes
+MODULES = ("architecture", "metrics", "sampling")
+
+#cache_key: hash of the class (and its sources and those of MODULES), the graph options, the graph seed and
+#           the TensorFlow version
+def cache_key(npde, options):
+    sources = hashlib.sha1()
+    for obj in list(type(npde).__mro__[:-1]) + [importlib.import_module(m) for m in MODULES]:
+        try:
+            with open(inspect.getsourcefile(obj), "rb") as file:
+                sources.update(file.read())
+        except (TypeError, OSError):
+            pass
+    data = {"class": type(npde).__module__ + "." + type(npde).__qualname__, "options": options,
+            "seed": tf.get_default_graph().seed, "tensorflow": tf.__version__, "sources": sources.hexdigest()}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def _name(obj):
+    if obj is None:
+        return None
+    if isinstance(obj, (list, tuple)):
+        return [_name(o) for o in obj]
+    if isinstance(obj, tf.Variable):
+        return ["var", obj.name]
+    if isinstance(obj, tf.Operation):
+        return ["op", obj.name]
+    return ["tensor", obj.name]
+
+def _resolve(graph, variables, name):
+    if name is None:
+        return None
+    if not (len(name) == 2 and name[0] in ("var", "op", "tensor")):
+        return [_resolve(graph, variables, n) for n in name]
+    kind, n = name
+    if kind == "var":
+        return variables[n]
+    if kind == "op":
+        return graph.get_operation_by_name(n)
+    return graph.get_tensor_by_name(n)
+
+#_register: adds variables to the variable store of the default graph, where import_meta_graph leaves them out
+def _register(variables):
+    store = variable_scope._get_default_variable_store()
+    for v in variables:
+        store._vars.setdefault(v.op.name, v)
+
+def _empty():
+    return not tf.get_default_graph().get_operations()
+
+#save: exports the default graph and the manifest of the graph attributes of npde
+def save(npde, folder, key):
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, key)
+    manifest = {a: _name(getattr(npde, a)) for a in GRAPH_ATTRS if hasattr(npde, a)}
+    tmp = "{}.{}.tmp".format(path, os.getpid())          # concurrent sweep workers may build the same key
+    tf.train.export_meta_graph(filename=tmp + ".meta", clear_devices=True)
+    os.replace(tmp + ".meta", path + ".meta")
+    with open(tmp + ".json", "w") as file:
+        json.dump(manifest, file)
+    os.replace(tmp + ".json", path + ".json")      # the manifest marks a complete entry
+
+#restore: imports the cached graph of key into the (empty) default graph and sets the graph attributes;
+#         returns False if the key is not cached
+def restore(npde, folder, key):
+    path = os.path.join(folder, key)
+    if not os.path.exists(path + ".json"):
+        return False
+    with open(path + ".json") as file:
+        manifest = json.load(file)
+    tf.train.import_meta_graph(path + ".meta")
+    graph = tf.get_default_graph()
+    _register(tf.global_variables())
+    variables = {v.name: v for v in tf.global_variables()}
+    for attr, name in manifest.items():
+        setattr(npde, attr, _resolve(graph, variables, name))
+    return True
+
+#build: builds the graph of npde with fn(), or restores it from the cache folder (None: no cache)
+def build(npde, folder, options, fn):
+    if folder is None or not _empty():
+        fn()
+        return
+    key = cache_key(npde, options)
+    if not restore(npde, folder, key):
+        fn()
+        save(npde, folder, key)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:14:26 2026
+
+@author: beacr
+"""
+
+# Chunked evaluation of a trained problem on large point sets. The points come from an array, a np.memmap
+# (read chunk by chunk, never loaded whole) or a generator of (m, d) blocks of any size, and are evaluated in
+# chunks of `chunk` points, by `threads` threads running sess.run concurrently; the fields ("u", "delta" for
+# the laplacian, "dx", "dy") are written to the columns of an (n, fields) array, or of a .npy memmap `out`
+# streamed to disk. The base classes expose it as npde.evaluate.
+#
+#   X = np.load("points.npy", mmap_mode="r")
+#   res = npde.evaluate(sess, X, fields=("u", "delta"), out="solution.npy", threads=4)
+#   res = npde.evaluate(sess, (np.random.rand(10**5, 5) for k in range(100)), out="u.npy", n=10**7)
+
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+FIELDS = ("u", "delta", "dx", "dy")
+
+#field_tensor: tensor of a field on the placeholder npde.x, built once per problem (npde.fields); the laplacian
+#              is that of the loss (delta), exact ("batched") instead of the stochastic "hutchinson" estimate
+def field_tensor(npde, field):
+    from pdebase import compute_delta, compute_dx, compute_dy, compute_laplacian
+
+    if getattr(npde, "fields", None) is None:
+        npde.fields = {"u": npde.u}
+    if field not in npde.fields:
+        if field == "dx":
+            npde.fields[field] = compute_dx(npde.u, npde.x)
+        elif field == "dy":
+            npde.fields[field] = compute_dy(npde.u, npde.x)
+        elif field == "delta":
+            if not hasattr(npde, "delta"):          # NNPDE
+                npde.fields[field] = compute_delta(npde.u, npde.x)
+            elif npde.laplacian == "hutchinson":
+                npde.fields[field] = compute_laplacian(npde.u, npde.u_out, npde.x, npde.d, "batched")
+            else:
+                npde.fields[field] = npde.delta(npde.u)
+        else:
+            raise ValueError("unknown field {}, expected one of {}".format(field, FIELDS))
+    return npde.fields[field]
+
+#chunks: blocks of exactly `chunk` rows (the last one shorter) of an array or of a generator of blocks
+def chunks(source, chunk):
+    if hasattr(source, "shape"):
+        for start in range(0, len(source), chunk):
+            yield source[start:start + chunk]
+        return
+    pending, size = [], 0
+    for block in source:
+        block = np.asarray(block)
+        while size + len(block) >= chunk:
+            k = chunk - size
+            pending.append(block[:k])
+            yield np.concatenate(pending) if len(pending) > 1 else pending[0]
+            block = block[k:]
+            pending, size = [], 0
+        if len(block):
+            pending.append(block)
+            size += len(block)
+    if pending:
+        yield np.concatenate(pending)
+
+#evaluate: fields of npde on the points of source, (n, len(fields)) in the order of fields; written to the .npy
+#          memmap `out` if given; n (number of points) is needed for a generator source with `out`
+def evaluate(npde, sess, source, fields=("u",), out=None, n=None, chunk=16384, threads=1, dtype=np.float64):
+    if getattr(npde, "ensemble", 1) > 1:
+        raise ValueError("evaluate needs a single network (ensemble=1)")
+    tensors = [field_tensor(npde, f) for f in fields]
+    xtype = npde.dtype.as_numpy_dtype
+    if hasattr(source, "shape"):
+        n = len(source)
+    if n is None:
+        if out is not None:
+            raise ValueError("the number of points n is needed to write a generator source to out")
+        parts = {}                  # start: results, concatenated at the end
+    elif out is None:
+        res = np.empty((n, len(fields)), dtype)
+    else:
+        res = np.lib.format.open_memmap(out, mode="w+", dtype=dtype, shape=(n, len(fields)))
+
+    def run(start, X):
+        values = np.stack(sess.run(tensors, feed_dict={npde.x: np.asarray(X, xtype)}), axis=1)
+        if n is None:
+            parts[start] = values
+        else:
+            res[start:start + len(X)] = values
+
+    start = 0
+    with ThreadPoolExecutor(threads) as pool:
+        running = collections.deque()       # at most 2*threads chunks in memory
+        for X in chunks(source, chunk):
+            if n is not None and start + len(X) > n:
+                raise ValueError("the source has more than n={} points".format(n))
+            running.append(pool.submit(run, start, X))
+            start += len(X)
+            while len(running) > 2 * threads:
+                running.popleft().result()
+        for f in running:
+            f.result()
+    if n is None:
+        return np.concatenate([parts[k] for k in sorted(parts)]) if parts else np.empty((0, len(fields)), dtype)
+    if start != n:
+        raise ValueError("the source has {} points, expected n={}".format(start, n))
+    if out is not None:
+        res.flush()
+    return res
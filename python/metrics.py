@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:05:17 2026
+
+@author: beacr
+"""
+
+import time
+
+import numpy as np
+
+
+#Cadence: decides when a metric is due, every `every` calls or (if given) at most once per `interval` seconds
+class Cadence:
+    def __init__(self, every=1, interval=None):
+        self.every = every
+        self.interval = interval
+        self.calls = 0
+        self.last = None
+
+    def due(self):
+        k = self.calls
+        self.calls += 1
+        if self.interval is not None:
+            now = time.time()
+            if self.last is None or now - self.last >= self.interval:
+                self.last = now
+                return True
+            return False
+        return k % self.every == 0
+
+
+#ReferenceGridL2: rms error on the reference grid of a 2D problem, optionally subsampled with `stride`;
+#                 the exact solution on the grid is computed once per problem instance
+class ReferenceGridL2(Cadence):
+    def __init__(self, npde, every=1, interval=None, stride=1):
+        Cadence.__init__(self, every, interval)
+        X = npde.X[::stride, ::stride]
+        Y = npde.Y[::stride, ::stride]
+        self.points = np.concatenate([X.reshape((-1, 1)), Y.reshape((-1, 1))], axis=1)
+        self.exact = npde.exactsol(X, Y).reshape(-1)
+
+    def evaluate(self, sess, u, x):
+        uh = sess.run(u, feed_dict={x: self.points})
+        return np.sqrt(np.mean((uh - self.exact) ** 2))
+
+
+#primes: first n prime numbers
+def primes(n):
+    p = []
+    k = 2
+    while len(p) < n:
+        if all(k % q for q in p if q * q <= k):
+            p.append(k)
+        k += 1
+    return np.array(p)
+
+#halton: n points of the Halton sequence in [0,1]^d; with a RandomState the digits are scrambled by
+#        random permutations (one per dimension and digit) and the truncated tail is filled uniformly,
+#        so that every point is uniformly distributed and independent scramblings give unbiased replicates
+def halton(n, d, rng=None):
+    P = np.zeros((n, d))
+    for j, p in enumerate(primes(d)):
+        i = np.arange(1, n + 1)
+        f = 1.0
+        while np.any(i > 0):
+            f /= p
+            digit = i % p
+            if rng is not None:
+                digit = rng.permutation(p)[digit]
+            P[:, j] += f * digit
+            i //= p
+        if rng is not None:
+            P[:, j] += f * rng.rand(n)
+    return P
+
+# 97.5% quantiles of the Student t distribution, by degrees of freedom
+_T975 = {1: 12.71, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+         10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042}
+
+def t975(df):
+    return _T975[max(k for k in _T975 if k <= df)] if df <= 30 else 1.96
+
+_qmc_points = {}
+
+#qmc_points: `replicates` independently scrambled Halton sets of n points in [0,1]^d, generated once and
+#            shared by all the problems with the same (n, d, replicates, seed)
+def qmc_points(n, d, replicates, seed=0):
+    key = (n, d, replicates, seed)
+    if key not in _qmc_points:
+        rng = np.random.RandomState(seed)
+        _qmc_points[key] = np.stack([halton(n, d, rng) for _ in range(replicates)])
+    return _qmc_points[key]
+
+#QMCL2: L2 error over [0,1]^d by randomized quasi-Monte Carlo quadrature; the network is evaluated in
+#       chunks of `chunk` points and the spread of the replicates gives a 95% confidence interval (ci)
+class QMCL2(Cadence):
+    def __init__(self, npde, n=4096, replicates=8, chunk=8192, every=1, interval=None, seed=0):
+        Cadence.__init__(self, every, interval)
+        self.points = qmc_points(n, npde.d, replicates, seed)
+        self.exact = npde.exactsol(self.points.reshape((-1, npde.d))).reshape((replicates, n))
+        self.chunk = chunk
+        self.ci = (np.nan, np.nan)
+
+    def evaluate(self, sess, u, x):
+        R, n, d = self.points.shape
+        X = self.points.reshape((-1, d))
+        uh = np.empty(R * n)
+        for a in range(0, R * n, self.chunk):
+            uh[a:a + self.chunk] = sess.run(u, feed_dict={x: X[a:a + self.chunk]})
+        mse = np.mean((uh.reshape((R, n)) - self.exact) ** 2, axis=1)  # one estimate per replicate
+        m = np.mean(mse)
+        h = t975(R - 1) * np.std(mse, ddof=1) / np.sqrt(R) if R > 1 else np.nan
+        self.ci = (np.sqrt(max(m - h, 0.0)), np.sqrt(m + h))
+        return np.sqrt(m)
@@ -7,10 +7,20 @@ Created on Wed Jul 29 11:18:24 2020
 
 import tensorflow as tf
 import numpy as np
-from matplotlib import pyplot as plt
-from matplotlib import pyplot, cm
-from mpl_toolkits.mplot3d import Axes3D
-from drawnow import drawnow, figure
+
+import graphcache
+import inference
+from metrics import ReferenceGridL2, QMCL2
+from sampling import CollocationSampler, EnsembleSampler
+from profiling import NULL_PROFILER
+from architecture import as_architecture, dense_network
+
+#plotting: matplotlib (with the 3D projection) and drawnow, imported only when something is plotted
+def plotting():
+    from matplotlib import pyplot as plt, cm
+    from mpl_toolkits.mplot3d import Axes3D
+    from drawnow import drawnow
+    return plt, cm, drawnow
 
 #assert_shape: error messages for shape mismatch between the given tensor and a desired one
 def assert_shape(x, shape):
@@ -40,6 +50,87 @@ def compute_delta_nd(u, x, n):
         delta += g[:,i]
     assert_shape(delta, (None,))
     return delta
+
+#compute_delta_batched: exact laplacian as trace of the hessian; the n hessian-vector products along
+#                       the basis vectors are taken in a single backward pass on n stacked copies of x
+def compute_delta_batched(fn, x, n):
+    m = tf.shape(x)[0]
+    xt = tf.reshape(tf.tile(x[tf.newaxis], [n, 1, 1]), (-1, n))    # block i is paired with e_i
+    e = tf.reshape(tf.tile(tf.eye(n, dtype=x.dtype)[:, tf.newaxis, :], [1, m, 1]), (-1, n))
+    grad = tf.gradients(fn(xt), xt)[0]
+    hv = tf.gradients(tf.reduce_sum(grad * e), xt)[0]                # rows of H(x) e_i
+    delta = tf.reduce_sum(tf.reshape(tf.reduce_sum(hv * e, axis=1), (n, -1)), axis=0)
+    assert_shape(delta, (None,))
+    return delta
+
+#compute_delta_hutchinson: stochastic trace estimate E[v^T H v] with `probes` Rademacher vectors per point
+def compute_delta_hutchinson(fn, x, n, probes=1):
+    xt = tf.reshape(tf.tile(x[tf.newaxis], [probes, 1, 1]), (-1, n))
+    v = tf.cast(2 * tf.random_uniform(tf.shape(xt), 0, 2, dtype=tf.int32) - 1, x.dtype)
+    grad = tf.gradients(fn(xt), xt)[0]
+    hv = tf.gradients(tf.reduce_sum(grad * v), xt)[0]
+    delta = tf.reduce_mean(tf.reshape(tf.reduce_sum(hv * v, axis=1), (probes, -1)), axis=0)
+    assert_shape(delta, (None,))
+    return delta
+
+#forward_laplacian: value, gradient and laplacian of the network of arch built by subnetwork/bsubnetwork
+#                   (variables scope/prefix+"dense{i}", scope/prefix+"last"), propagated layer by layer from the
+#                   first and second derivative of the activation (Architecture.derivatives) and of the
+#                   Fourier embedding: no gradient of a gradient
+def forward_laplacian(x, scope, prefix, arch):
+    n = x.get_shape().as_list()[1]
+    h, J, L = arch.embed_forward(x)       # J, L None: h = x, dx/dx = I, laplacian of x = 0
+    with tf.variable_scope(scope, reuse=True):
+        for i in range(arch.N + 1):
+            with tf.variable_scope(prefix + ("dense{}".format(i) if i < arch.N else "last"), reuse=True):
+                W = tf.get_variable("kernel", dtype=x.dtype)
+                b = tf.get_variable("bias", dtype=x.dtype)
+            k = W.get_shape().as_list()[1]
+            z = tf.matmul(h, W) + b
+            if J is None:
+                Jz = tf.tile(W[tf.newaxis], [tf.shape(x)[0], 1, 1])
+                Lz = tf.zeros_like(z)
+            else:
+                Jz = tf.reshape(tf.matmul(tf.reshape(J, (-1, J.get_shape().as_list()[2])), W), (-1, n, k))
+                Lz = tf.matmul(L, W)
+            if i == arch.N:
+                h, J, L = z, Jz, Lz
+            else:
+                a, d1, d2 = arch.derivatives(z)
+                Ja = d1[:, tf.newaxis, :] * Jz       # (batch, n, units)
+                La = d1 * Lz + d2 * tf.reduce_sum(Jz ** 2, axis=1)
+                if arch.skip(i, n):
+                    h, J, L = h + a, J + Ja, L + La
+                else:
+                    h, J, L = a, Ja, La
+    return h[:, 0], J[:, :, 0], L[:, 0]
+
+#compute_delta_forward: laplacian of u = bsubnetwork(x) + B(x)*subnetwork(x) from forward_laplacian,
+#                       delta(B*S) = B*delta(S) + 2*grad(B).grad(S) + S*delta(B)
+def compute_delta_forward(npde, x):
+    _, _, lb = forward_laplacian(x, "boundary", "b", npde.arch)
+    S, gS, lS = forward_laplacian(x, "inner", "", npde.arch)
+    B = npde.B(x)
+    gB = tf.gradients(B, x)[0]
+    lB = compute_delta_batched(npde.B, x, npde.d)
+    delta = lb + B * lS + 2 * tf.reduce_sum(gB * gS, axis=1) + S * lB
+    assert_shape(delta, (None,))
+    return delta
+
+#compute_laplacian: laplacian of u = fn(x) with the selected method
+#   "reverse"    - one reverse pass per dimension (compute_delta_nd), reference
+#   "batched"    - exact trace, all dimensions in one pass (compute_delta_batched)
+#   "hutchinson" - stochastic trace estimator (compute_delta_hutchinson)
+#   "forward"    - closed-form forward propagation through the networks (compute_delta_forward),
+#                  selected through the delta method of NNPDE2/NNPDE_ND
+def compute_laplacian(u, fn, x, n, method="reverse", probes=1):
+    if method == "reverse":
+        return compute_delta_nd(u, x, n)
+    if method == "batched":
+        return compute_delta_batched(fn, x, n)
+    if method == "hutchinson":
+        return compute_delta_hutchinson(fn, x, n, probes)
+    raise ValueError("Unknown laplacian method: {}".format(method))
 						
 #compute_dx: x-derivative
 def compute_dx(u,x):
@@ -55,6 +146,15 @@ def compute_dy(u,x):
     assert_shape(dudy, (None,))
     return dudy
 
+#PRECISIONS: (compute dtype, dtype of the loss reductions) of each precision policy
+PRECISIONS = {"float64": (tf.float64, tf.float64),
+              "float32": (tf.float32, tf.float32),
+              "mixed": (tf.float32, tf.float64)}   # float32 network, float64 loss accumulation
+
+#sum_squares: sum of squared residuals accumulated in dtype
+def sum_squares(r, dtype):
+    return tf.reduce_sum(tf.cast(r, dtype) ** 2)
+
 #rectaspace: creation of a grid of x- and y- equispaced points in a rectangle abcd
 def rectspace(a,b,c,d,n):
     x = np.linspace(a,b,n)
@@ -62,41 +162,278 @@ def rectspace(a,b,c,d,n):
     [X,Y] = np.meshgrid(x,y)
     return np.concatenate([X.reshape((-1, 1)), Y.reshape((-1, 1))], axis=1)
 
+#fused_step: boundary sub-steps (gated on bloss>btol), inner step and l2 on x_ref in one graph call
+#            returns the ops to fetch ([step, bloss, loss]) and the l2 tensor (None without x_ref)
+def fused_step(npde, x_ref=None, u_ref=None, nsteps=5):
+    var_list1 = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "boundary")
+    var_list2 = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "inner")
+    gate = npde.bloss > npde.btol          # probe on the current boundary weights
+
+    def cond(k, bloss):
+        return tf.logical_and(gate, k < nsteps)
+
+    def body(k, bloss):
+        with tf.control_dependencies([bloss]):   # read the weights updated by the previous sub-step
+            u_b = npde.bsubnetwork(npde.x_b, True)
+            bl = sum_squares(npde.tfexactsol(npde.x_b) - u_b, npde.loss_dtype)
+        grads = tf.gradients(bl, var_list1)
+        step = npde.optimizer1.apply_gradients(zip(grads, var_list1))
+        with tf.control_dependencies([step]):
+            return k + 1, tf.identity(bl)
+
+    _, bloss = tf.while_loop(cond, body, [tf.constant(0), npde.bloss],
+                             parallel_iterations=1, back_prop=False)
+
+    # inner step on the updated boundary network
+    with tf.control_dependencies([bloss]):
+        loss = npde.loss_function(npde.u_out(npde.x))
+    grads = tf.gradients(loss, var_list2)
+    step = npde.optimizer2.apply_gradients(zip(grads, var_list2))
+    if x_ref is None:
+        return [step, bloss, loss], None
+
+    # the reference points enter as a (None, d) placeholder: the subnetworks expect an unknown batch size
+    x = tf.placeholder_with_default(tf.constant(x_ref, dtype=npde.dtype), (None, x_ref.shape[1]))
+    with tf.control_dependencies([step]):
+        uh = npde.u_out(x)
+        l2 = tf.sqrt(tf.reduce_mean((tf.cast(uh, tf.float64) - u_ref) ** 2))
+    return [step, bloss, loss], l2
+
+#joint_step: one optimizer step on bweight*bloss + loss over both subnetworks, with the boundary subnetwork
+#            evaluated once on the concatenated boundary and inner points (shared forward and backward pass);
+#            the weight is fixed ("fixed"), balanced by the gradient norms of the two losses ("gradnorm":
+#            moving average of |grad loss|/|grad bloss|, updated by the returned balance op) or learned
+#            ("learned": exp(-s_b)*bloss + exp(-s_i)*loss + s_b + s_i with trainable s_b, s_i)
+#            returns the ops to fetch ([step, bloss, loss]), the balance op (None if not "gradnorm")
+#            and the weight of bloss relative to loss
+def joint_step(npde, weighting="fixed", bweight=1.0, lr=0.001, alpha=0.1):
+    nb = tf.shape(npde.x_b)[0]
+    ub = npde.bsubnetwork(tf.concat([npde.x_b, npde.x], 0), True)
+    u = ub[nb:] + npde.B(npde.x) * npde.subnetwork(npde.x, True)
+    bloss = sum_squares(npde.tfexactsol(npde.x_b) - ub[:nb], npde.loss_dtype)
+    loss = npde.loss_function(u)
+    var_list = (tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "boundary") +
+                tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "inner"))
+
+    balance = None
+    with tf.variable_scope("weights"):
+        if weighting == "fixed":
+            weight = tf.constant(bweight, npde.loss_dtype)
+            total = weight * bloss + loss
+        elif weighting == "gradnorm":
+            weight = tf.get_variable("bweight", initializer=tf.constant(bweight, npde.loss_dtype),
+                                     trainable=False)
+            def norm(grads):
+                return tf.sqrt(tf.add_n([tf.reduce_sum(tf.cast(g, npde.loss_dtype) ** 2)
+                                         for g in grads if g is not None]))
+            ratio = norm(tf.gradients(loss, var_list)) / (norm(tf.gradients(bloss, var_list)) + 1e-12)
+            balance = weight.assign((1 - alpha) * weight + alpha * ratio)
+            total = weight * bloss + loss
+        elif weighting == "learned":
+            s_b = tf.get_variable("s_b", initializer=tf.constant(-np.log(bweight), npde.loss_dtype))
+            s_i = tf.get_variable("s_i", initializer=tf.constant(0.0, npde.loss_dtype))
+            weight = tf.exp(s_i - s_b)
+            total = tf.exp(-s_b) * bloss + tf.exp(-s_i) * loss + s_b + s_i
+            var_list = var_list + [s_b, s_i]
+        else:
+            raise ValueError("unknown weighting: {}".format(weighting))
+
+    npde.optimizer = tf.train.AdamOptimizer(learning_rate=lr, name="JointAdam")   # own slot names
+    step = npde.optimizer.minimize(total, var_list=var_list)
+    return [step, bloss, loss], balance, weight
+
+#ensemble_network: K copies of the network of arch (hidden layers, linear output) evaluated with batched
+#                  matmuls; the rows of x are the points of the members one after the other (K blocks of the
+#                  same size) and the weights prefix+"dense{i}", prefix+"last" are stacked along axis 0; the
+#                  Fourier embedding, a fixed map of the points, is shared by the members
+def ensemble_network(x, K, arch, prefix):
+    d = x.get_shape().as_list()[1]
+    sizes = arch.sizes(d)
+    h = tf.reshape(arch.embed(x), (K, -1, sizes[0]))
+    for i in range(arch.N + 1):
+        name = prefix + ("dense{}".format(i) if i < arch.N else "last")
+        limit = np.sqrt(6.0 / (sizes[i] + sizes[i + 1]))       # glorot uniform, as tf.layers.dense
+        W = tf.get_variable(name + "/kernel", (K, sizes[i], sizes[i + 1]), x.dtype,
+                            tf.random_uniform_initializer(-limit, limit))
+        b = tf.get_variable(name + "/bias", (K, 1, sizes[i + 1]), x.dtype, tf.zeros_initializer())
+        z = tf.matmul(h, W) + b
+        if i == arch.N:
+            h = z
+        elif arch.skip(i, d):
+            h = h + arch.fn(z)
+        else:
+            h = arch.fn(z)
+    return tf.reshape(h, (-1,))
+
+#batched_adam: Adam on variables stacked along a first member axis, with the learning rate lr[k] of member k
+def batched_adam(loss, var_list, lr, name, beta1=0.9, beta2=0.999, epsilon=1e-8):
+    grads = tf.gradients(loss, var_list)
+    with tf.variable_scope(name):
+        t = tf.get_variable("t", initializer=tf.constant(0.0, tf.float64), trainable=False)
+        slots = [(tf.get_variable(v.op.name + "/m", v.shape, v.dtype, tf.zeros_initializer(), trainable=False),
+                  tf.get_variable(v.op.name + "/v", v.shape, v.dtype, tf.zeros_initializer(), trainable=False))
+                 for v in var_list]
+    t1 = t.assign_add(1.0)
+    lr_t = lr * tf.sqrt(1 - beta2 ** t1) / (1 - beta1 ** t1)      # bias correction
+    updates = []
+    for var, g, (m, v) in zip(var_list, grads, slots):
+        m1 = m.assign(beta1 * m + (1 - beta1) * g)
+        v1 = v.assign(beta2 * v + (1 - beta2) * g ** 2)
+        step = tf.reshape(tf.cast(lr_t, var.dtype), [-1] + [1] * (var.shape.ndims - 1))
+        updates.append(var.assign_sub(step * m1 / (tf.sqrt(v1) + epsilon)))
+    return tf.group(*updates)
+
+#ensemble_step: per-member losses and batched Adam steps of ensemble mode; the summed losses bloss and loss
+#               have independent gradients for each member, lr_scale holds the learning rate of member k
+#               (npde.lrs[k]) relative to the initial learning rate lr of npde.lr; the member losses are those of
+#               npde.residual (clipped as in the loss of the problem) and loss is their sum
+def ensemble_step(npde, lr):
+    K = npde.ensemble
+    rb = tf.cast(npde.tfexactsol(npde.x_b) - npde.u_b, npde.loss_dtype)
+    npde.blosses = tf.reduce_sum(tf.reshape(rb ** 2, (K, -1)), axis=1)
+    r = tf.cast(npde.residual(npde.u), npde.loss_dtype)
+    npde.losses = tf.reduce_sum(tf.reshape(r ** 2, (K, -1)), axis=1)
+    npde.loss = tf.reduce_sum(npde.losses)
+    npde.lr_scale = tf.Variable(np.array(npde.lrs) / lr, trainable=False, dtype=tf.float64, name="lr_scale")
+    lr = npde.lr * npde.lr_scale
+    npde.opt1 = batched_adam(npde.bloss, tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "boundary"),
+                             lr, "adam1")
+    npde.opt2 = batched_adam(npde.loss, tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "inner"),
+                             lr, "adam2")
+
+#ensemble_l2: L2 error of every member on the points of the l2 metric
+def ensemble_l2(npde, sess, chunk=8192):
+    K = npde.ensemble
+    P = npde.l2metric.points.reshape((-1, npde.d))
+    E = npde.l2metric.exact.reshape(-1)
+    se = np.zeros(K)
+    for a in range(0, len(P), chunk):
+        uh = sess.run(npde.u, feed_dict={npde.x: np.tile(P[a:a + chunk], (K, 1))})
+        se += np.sum((uh.reshape((K, -1)) - E[a:a + chunk]) ** 2, axis=1)
+    return np.sqrt(se / len(P))
+
+#ensemble_train: training step of ensemble mode; the boundary steps run while some member has bloss>btol,
+#                rloss/rbloss/rl2 hold the sums (mean for rl2) and rloss_members, rbloss_members,
+#                rl2_members the values of every member
+def ensemble_train(npde, sess, i=-1):
+    prof = npde.profiler
+    prof.start(i)
+    with prof.phase("sampling"):
+        bX, X = npde.sampler.next(sess)
+    with prof.phase("bloss"):
+        blosses = sess.run(npde.blosses, feed_dict={npde.x_b: bX}, **prof.options("bloss"))
+    if blosses.max() > npde.btol:
+        with prof.phase("opt1"):
+            for _ in range(5):
+                _, blosses = sess.run([npde.opt1, npde.blosses], feed_dict={npde.x_b: bX},
+                                      **prof.options("opt1"))
+    with prof.phase("opt2"):
+        _, losses = sess.run([npde.opt2, npde.losses], feed_dict={npde.x: X}, **prof.options("opt2"))
+
+    npde.rbloss_members.append(blosses)
+    npde.rloss_members.append(losses)
+    npde.rbloss.append(blosses.sum())
+    npde.rloss.append(losses.sum())
+    if npde.l2metric.due():
+        with prof.phase("rl2"):
+            l2 = ensemble_l2(npde, sess)
+        npde.rl2_members.append(l2)
+        npde.rl2.append(l2.mean())
+        if hasattr(npde, "rl2_ci"):
+            npde.rl2_ci.append((np.nan, np.nan))
+        npde.rl2_iter.append(len(npde.rloss) - 1)
+
 
 #class definition of d-dimensional NNPDE
 class NNPDE_ND:
-    def __init__(self,batch_size, N, d): # d- dimension, N-number of layers
+    btol = 1e-5     # boundary training is skipped once bloss<=btol
+    profiler = NULL_PROFILER   # timers of the train phases, see profiling.py
+
+    def __init__(self,batch_size, N, d, fused=False, laplacian="reverse", probes=1,
+                 l2_every=100, l2_interval=None, l2_points=4096, l2_replicates=8, lr=0.001,
+                 prefetch=2, precision="float64", joint=False, weighting="fixed", bweight=1.0,
+                 balance_every=10, cache=None, ensemble=1, lrs=None, arch=None): # d- dimension, N-number of layers
+        self.rloss = []
+        self.rbloss = []
+        self.rl2 = []
+        self.rl2_ci = []
+        self.rl2_iter = [] # iterations at which rl2 was recorded
+        self.rloss_members = [] # ensemble mode: values of every member
+        self.rbloss_members = []
+        self.rl2_members = []
+
         self.d = d
         self.batch_size = batch_size
-        self.N = N
+        self.arch = as_architecture(arch, N)  # widths, activation, residual, Fourier features (see architecture.py)
+        self.N = self.arch.N
+        self.fused = fused      # run boundary steps, inner step and L2 in a single sess.run
+        self.joint = joint      # one optimizer on the weighted sum of bloss and loss (see joint_step)
+        self.balance_every = balance_every  # iterations between weight updates of weighting="gradnorm"
+        self.laplacian = laplacian  # see compute_laplacian
+        self.probes = probes        # probe vectors per point for laplacian="hutchinson"
+        self.dtype, self.loss_dtype = PRECISIONS[precision]
+        self.ensemble = ensemble    # independent copies of the subnetworks trained together (see ensemble_step)
+        self.lrs = [lr] * ensemble if lrs is None else list(lrs)   # learning rate of every copy
+        if ensemble > 1 and (fused or joint or laplacian != "reverse"):
+            raise ValueError('ensemble mode supports only laplacian="reverse", without fused or joint steps')
+        if fused and joint:
+            raise ValueError("fused and joint steps are exclusive")
+        # boundary and interior batches, prefetched by a background thread
+        if ensemble > 1:
+            self.sampler = EnsembleSampler(d, batch_size, ensemble, self.extra_points(), prefetch,
+                                           dtype=self.dtype.as_numpy_dtype)
+        else:
+            self.sampler = CollocationSampler(d, batch_size, self.extra_points(), prefetch,
+                                              dtype=self.dtype.as_numpy_dtype)
+
+				#test values
+        self.X_test = np.array([0.5]*self.d)[np.newaxis,:]
+        # L2 error by randomized QMC on l2_replicates x l2_points points, every l2_every iterations
+        self.l2metric = QMCL2(self, l2_points, l2_replicates, every=l2_every, interval=l2_interval)
 
-        self.x = tf.placeholder(tf.float64, (None, d))  # inner data
-        self.x_b = tf.placeholder(tf.float64, (None, d))  # boundary data
+        # graph built, or imported from the graph cache folder `cache` (see graphcache.py)
+        graphcache.build(self, cache, dict(arch=self.arch.options(), d=d, laplacian=laplacian, probes=probes,
+                                           fused=fused, joint=joint, weighting=weighting, bweight=bweight, lr=lr,
+                                           precision=precision, ensemble=ensemble, lrs=self.lrs),
+                         lambda: self.build(lr, weighting, bweight))
+
+		#build: placeholders, subnetworks, losses and optimizers
+    def build(self, lr, weighting, bweight):
+        self.x = tf.placeholder(self.dtype, (None, self.d))  # inner data
+        self.x_b = tf.placeholder(self.dtype, (None, self.d))  # boundary data
 
         self.u_b = self.bsubnetwork(self.x_b, False)  #solution on the boundary given by
 																											#subnetwork on the boundary
-        self.u = self.bsubnetwork(self.x, True) + self.B(self.x) * self.subnetwork(self.x, False)
+        self.u = self.u_out(self.x, False)
 																											#overall solution given by
 																											#subnetwork in the inner domain
 																											#lifted by subnetwork on the boundary
 
-        self.bloss = tf.reduce_sum((self.tfexactsol(self.x_b) - self.u_b) ** 2)
+        self.bloss = sum_squares(self.tfexactsol(self.x_b) - self.u_b, self.loss_dtype)
         self.loss = self.loss_function()
 
 				#training options and initial values (minimisation of loss)
+        self.lr = tf.Variable(lr, trainable=False, dtype=tf.float64, name="lr") # learning rate of the optimizers, see control.py
         var_list1 = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "boundary")
 																												#get_collection: collection of data named "boundary"
 																												#TRAINABLE_VARIABLES: constuctor that automatically
 																												# returns a list of new variables
-        self.opt1 = tf.train.AdamOptimizer(learning_rate=0.001).minimize(self.bloss, var_list=var_list1)
-        var_list2 = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "inner")
-        self.opt2 = tf.train.AdamOptimizer(learning_rate=0.001).minimize(self.loss, var_list=var_list2)
+        if self.ensemble > 1:
+            ensemble_step(self, lr)
+        elif not self.joint:    # the joint mode has its own optimizer (joint_step)
+            self.optimizer1 = tf.train.AdamOptimizer(learning_rate=self.lr)
+            self.opt1 = self.optimizer1.minimize(self.bloss, var_list=var_list1)
+            var_list2 = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "inner")
+            self.optimizer2 = tf.train.AdamOptimizer(learning_rate=self.lr)
+            self.opt2 = self.optimizer2.minimize(self.loss, var_list=var_list2)
+
+        if self.fused:
+            self.fused_ops, _ = fused_step(self)
+        if self.joint:
+            self.joint_ops, self.balance, self.bweight = joint_step(self, weighting, bweight, self.lr)
         self.init = tf.global_variables_initializer()		#Only after running tf.global_variables_initializer()
 																												#in a session your variables hold the values
 																												#you told them to hold at declaration time
-				
-				#test values
-        self.X_test = np.array([0.5]*self.d)[np.newaxis,:]
 
     def tfexactsol(self, x):
         raise NotImplementedError
@@ -111,50 +448,133 @@ class NNPDE_ND:
     def f(self, x):
         raise NotImplementedError
 
-		#subnetwork defines a dense neural network on inner points with tanh activation and output dimensionality 256
+		#subnetwork defines the dense neural network of self.arch on inner points (see architecture.py)
     def subnetwork(self, x, reuse = False):
+        if self.ensemble > 1:
+            with tf.variable_scope("inner", reuse=tf.AUTO_REUSE):
+                return ensemble_network(x, self.ensemble, self.arch, "")
         with tf.variable_scope("inner"):            #variable_scope: create new variables and share
 																										#already created ones while providing checks
 																										#to not create or share by accident
-            for i in range(self.N):
-                x = tf.layers.dense(x, 256, activation=tf.nn.tanh, name="dense{}".format(i), reuse=reuse)
-            x = tf.layers.dense(x, 1, activation=None, name="last", reuse=reuse)
-            x = tf.squeeze(x, axis=1)								#squeeze removes element in position 1
+            x = dense_network(x, self.arch, "", reuse)
             assert_shape(x, (None,))
         return x
 
-		#subnetwork defines a dense neural network on boundary points with tanh activation and output dimensionality 256
+		#bsubnetwork defines the dense neural network of self.arch on boundary points
     def bsubnetwork(self, x, reuse = False):
+        if self.ensemble > 1:
+            with tf.variable_scope("boundary", reuse=tf.AUTO_REUSE):
+                return ensemble_network(x, self.ensemble, self.arch, "b")
         with tf.variable_scope("boundary"):
-            for i in range(self.N):
-                x = tf.layers.dense(x, 256, activation=tf.nn.tanh, name="bdense{}".format(i), reuse=reuse)
-            x = tf.layers.dense(x, 1, activation=None, name="blast", reuse=reuse)
-            x = tf.squeeze(x, axis=1)
+            x = dense_network(x, self.arch, "b", reuse)
             assert_shape(x, (None,))
         return x
 
-		#compute SSE (sum of squared errors)
-    def loss_function(self):
-        deltah = compute_delta_nd(self.u, self.x, self.d) 	#laplacian of u(x)
+		#overall solution: boundary subnetwork lifted by B(x) times the inner subnetwork
+    def u_out(self, x, reuse=True):
+        return self.bsubnetwork(x, True) + self.B(x) * self.subnetwork(x, reuse)
+
+		#evaluate: fields "u", "delta", "dx", "dy" on a large point source (array, memmap or generator) in chunks,
+		#          optionally streamed to the .npy memmap `out` (see inference.py)
+    def evaluate(self, sess, points, fields=("u",), out=None, n=None, chunk=16384, threads=1):
+        return inference.evaluate(self, sess, points, fields, out, n, chunk, threads)
+
+		#laplacian of u = u_out(x) with the method chosen at construction
+    def delta(self, u):
+        if self.laplacian == "forward":
+            return compute_delta_forward(self, self.x)
+        return compute_laplacian(u, self.u_out, self.x, self.d, self.laplacian, self.probes)
+
+		#residual: point-wise residual delta(u) - f on the inner points
+    def residual(self, u=None):
+        u = self.u if u is None else u
+        deltah = self.delta(u) 	#laplacian of u(x)
         delta = self.f(self.x)														  #data f(x)
-        res = tf.reduce_sum((deltah - delta) ** 2)
+        res = deltah - delta
+        assert_shape(res, (None,))
+        return res
+
+		#compute SSE (sum of squared errors)
+    def loss_function(self, u=None):
+        res = sum_squares(self.residual(u), self.loss_dtype)
         assert_shape(res, ())
         return res
 
+    def point_wise_loss(self):
+        deltah = self.delta(self.u)
+        delta = self.f(self.x)
+        res = tf.abs(deltah - delta)
+        assert_shape(res, (None,))
+        return res
+
 
     def compute_L2(self, sess, x):
         u0 = self.exactsol(x)
-        u1 = sess.run(self.u, feed_dict={self.x: x})[0]   #evaluation of the graph of u on the data given by x
+        u1 = sess.run(self.u, feed_dict={self.x: x})   #evaluation of the graph of u on the data given by x
 																													## feed_dict is a dictionary where every variable
 																													## is a place_holder for given type
         return np.sqrt(np.mean((u0-u1)**2))
-			
-			## REMARK: need to define a train function member in the inherited classes !!
+
+    # fixed points added to every interior batch
+    def extra_points(self):
+        return None
+
+    #joint_train: one step of the joint optimizer (weight balanced first when due)
+    def joint_train(self, sess, bX, X):
+        prof = self.profiler
+        feed = {self.x_b: bX, self.x: X}
+        if self.balance is not None and len(self.rloss) % self.balance_every == 0:
+            with prof.phase("balance"):
+                sess.run(self.balance, feed_dict=feed, **prof.options("balance"))
+        with prof.phase("joint"):
+            _, bloss, loss = sess.run(self.joint_ops, feed_dict=feed, **prof.options("joint"))
+        return bloss, loss
+
+    def train(self, sess, i=-1):
+        if self.ensemble > 1:
+            return ensemble_train(self, sess, i)
+        prof = self.profiler
+        prof.start(i)
+        with prof.phase("sampling"):
+            bX, X = self.sampler.next(sess)
+
+        if self.joint:
+            bloss, loss = self.joint_train(sess, bX, X)
+        elif self.fused:
+            with prof.phase("fused"):
+                _, bloss, loss = sess.run(self.fused_ops, feed_dict={self.x_b: bX, self.x: X},
+                                          **prof.options("fused"))
+        else:
+            with prof.phase("bloss"):
+                bloss = sess.run([self.bloss], feed_dict={self.x_b: bX}, **prof.options("bloss"))[0]
+            # if the loss is small enough, stop training on the boundary
+            if bloss>self.btol:
+                with prof.phase("opt1"):
+                    for _ in range(5):
+                        _, bloss = sess.run([self.opt1, self.bloss], feed_dict={self.x_b: bX},
+                                            **prof.options("opt1"))
+                prof.count("opt1 steps", 5)
+
+            with prof.phase("opt2"):
+                _, loss = sess.run([self.opt2, self.loss], feed_dict={self.x: X}, **prof.options("opt2"))
+
+        # ######### record loss ############
+        self.rbloss.append(bloss)
+        self.rloss.append(loss)
+        if self.l2metric.due():
+            with prof.phase("rl2"):
+                self.rl2.append(self.l2metric.evaluate(sess, self.u, self.x))
+            self.rl2_ci.append(self.l2metric.ci)
+            self.rl2_iter.append(len(self.rloss) - 1)
+        # ######### record loss ############
 			
 
 #class definition of 2-dimensional (x,y) NNPDE with boundary data
 class NNPDE:
-    def __init__(self, batch_size, N, refn):
+    profiler = NULL_PROFILER   # timers of the train phases, see profiling.py
+
+    def __init__(self, batch_size, N, refn, precision="float64", lr=0.001, cache=None, arch=None):
+        self.rloss = []
         self.refn = refn  # reference points
 				#(x,y) coordinates:
         x = np.linspace(0, 1, refn) #x-variable
@@ -166,17 +586,26 @@ class NNPDE:
 																													#(-1 means unspecified number of rows)
 
         self.batch_size = batch_size  # batchsize
-        self.N = N
-
-        self.x = tf.placeholder(tf.float64, (None, 2))
+        self.arch = as_architecture(arch, N)  # widths, activation, residual, Fourier features (see architecture.py)
+        self.N = self.arch.N
+
+        self.dtype, self.loss_dtype = PRECISIONS[precision]
+        self.fig = None # created by visualize
+        # graph built, or imported from the graph cache folder `cache` (see graphcache.py)
+        graphcache.build(self, cache, dict(arch=self.arch.options(), lr=lr, precision=precision),
+                         lambda: self.build(lr))
+
+		#build: placeholder, network, loss and optimizer
+    def build(self, lr):
+        self.x = tf.placeholder(self.dtype, (None, 2))
         self.u = self.u_out(self.x)                     #solution given by neural network
 																												#lifted by A(x)
         self.loss = self.loss_function()
         self.ploss = self.point_wise_loss()
-        self.fig = plt.figure()
 
 				#training options and initial values
-        self.opt = tf.train.AdamOptimizer(learning_rate=0.001).minimize(self.loss)
+        self.lr = tf.Variable(lr, trainable=False, dtype=tf.float64, name="lr")
+        self.opt = tf.train.AdamOptimizer(learning_rate=self.lr).minimize(self.loss)
         self.init = tf.global_variables_initializer()
 
     def exactsol(self, x, y):
@@ -199,19 +628,15 @@ class NNPDE:
     def loss_function(self):
         deltah = compute_delta(self.u, self.x)
         delta = self.f(self.x)
-        res = tf.reduce_sum((deltah - delta) ** 2)
+        res = sum_squares(deltah - delta, self.loss_dtype)
         assert_shape(res, ())
         return res
 
     ### end modification
 
-		#subnetwork defines a dense neural network with tanh activation and output dimensionality 256
+		#subnetwork defines the dense neural network of self.arch (see architecture.py)
     def subnetwork(self, x):
-        for i in range(self.N):
-            x = tf.layers.dense(x, 256, activation=tf.nn.tanh)
-        x = tf.layers.dense(x, 1, activation=None, name="last")
-        x = tf.squeeze(x, axis=1)
-        return x
+        return dense_network(x, self.arch, "")
 
 		#evaluation of the solution given by the neural network
     def u_out(self, x):
@@ -219,6 +644,11 @@ class NNPDE:
         assert_shape(res, (None,))
         return res
 
+		#evaluate: fields "u", "delta", "dx", "dy" on a large point source (array, memmap or generator) in chunks,
+		#          optionally streamed to the .npy memmap `out` (see inference.py)
+    def evaluate(self, sess, points, fields=("u",), out=None, n=None, chunk=16384, threads=1):
+        return inference.evaluate(self, sess, points, fields, out, n, chunk, threads)
+
     def point_wise_loss(self):
         deltah = compute_delta(self.u, self.x)
         delta = self.f(self.x)
@@ -237,8 +667,13 @@ class NNPDE:
 
          uhref = self.exactsol(X, Y)
 
+         plt, cm, drawnow = plotting()
+         if self.fig is None:
+             self.fig = plt.figure()
+
          def draw():
-             ax = self.fig.gca(projection='3d')
+             self.fig.clf()      # one 3D axes per draw, not one more on every call
+             ax = self.fig.add_subplot(111, projection='3d')
              if not showonlysol:
                  ax.plot_surface(X, Y, uhref, rstride=1, cstride=1, cmap=cm.autumn,
                                  linewidth=0, antialiased=False, alpha=0.3)
@@ -256,8 +691,13 @@ class NNPDE:
 
     def train(self, sess, i=-1):
         # self.X = rectspace(0,0.5,0.,0.5,self.n)
-        X = np.random.rand(self.batch_size, 2)
-        _, loss = sess.run([self.opt, self.loss], feed_dict={self.x: X})
+        prof = self.profiler
+        prof.start(i)
+        with prof.phase("sampling"):
+            X = np.random.rand(self.batch_size, 2)
+        with prof.phase("opt"):
+            _, loss = sess.run([self.opt, self.loss], feed_dict={self.x: X}, **prof.options("opt"))
+        self.rloss.append(loss)
         if i % 10 == 0:
             print("Iteration={}, loss= {}".format(i, loss))
 					
@@ -265,37 +705,90 @@ class NNPDE:
 					
 #class definition of 2-dimensional (x,y) NNPDE with 0 boundary data
 class NNPDE2:
-    def __init__(self, batch_size, N, refn):
+    btol = 1e-5     # boundary training is skipped once bloss<=btol
+    profiler = NULL_PROFILER   # timers of the train phases, see profiling.py
+
+    def __init__(self, batch_size, N, refn, fused=False, laplacian="reverse", probes=1,
+                 l2_every=1, l2_interval=None, l2_stride=1, lr=0.001, prefetch=2, precision="float64",
+                 joint=False, weighting="fixed", bweight=1.0, balance_every=10, cache=None, ensemble=1, lrs=None,
+                 arch=None):
         self.rloss = []
         self.rbloss = []
         self.rl2 = []
+        self.rl2_iter = [] # iterations at which rl2 was recorded
+        self.rloss_members = [] # ensemble mode: values of every member
+        self.rbloss_members = []
+        self.rl2_members = []
 
         self.refn = refn  # reference points
         x = np.linspace(0, 1, refn)
         y = np.linspace(0, 1, refn)
         self.X, self.Y = np.meshgrid(x, y)
         self.refX = np.concatenate([self.X.reshape((-1, 1)), self.Y.reshape((-1, 1))], axis=1)
+        # rl2 every l2_every iterations (or every l2_interval seconds) on every l2_stride-th grid point
+        self.l2metric = ReferenceGridL2(self, l2_every, l2_interval, l2_stride)
 
         self.batch_size = batch_size  # batchsize
-        self.N = N # number of dense layers
-
-        self.x = tf.placeholder(tf.float64, (None, 2)) # inner data
-        self.x_b = tf.placeholder(tf.float64, (None, 2)) # boundary data
+        self.arch = as_architecture(arch, N) # widths, activation, residual, Fourier features (see architecture.py)
+        self.N = self.arch.N # number of dense layers
+        self.d = 2
+        self.fused = fused # run boundary steps, inner step and rl2 in a single sess.run
+        self.joint = joint # one optimizer on the weighted sum of bloss and loss (see joint_step)
+        self.balance_every = balance_every # iterations between weight updates of weighting="gradnorm"
+        self.laplacian = laplacian # see compute_laplacian
+        self.probes = probes # probe vectors per point for laplacian="hutchinson"
+        self.dtype, self.loss_dtype = PRECISIONS[precision] # see PRECISIONS
+        self.ensemble = ensemble # independent copies of the subnetworks trained together (see ensemble_step)
+        self.lrs = [lr] * ensemble if lrs is None else list(lrs) # learning rate of every copy
+        if ensemble > 1 and (fused or joint or laplacian != "reverse"):
+            raise ValueError('ensemble mode supports only laplacian="reverse", without fused or joint steps')
+        if fused and joint:
+            raise ValueError("fused and joint steps are exclusive")
+        # boundary and interior batches, prefetched by a background thread
+        if ensemble > 1:
+            self.sampler = EnsembleSampler(2, batch_size, ensemble, self.extra_points(), prefetch,
+                                           dtype=self.dtype.as_numpy_dtype)
+        else:
+            self.sampler = CollocationSampler(2, batch_size, self.extra_points(), prefetch,
+                                              dtype=self.dtype.as_numpy_dtype)
+
+        # graph built, or imported from the graph cache folder `cache` (see graphcache.py)
+        graphcache.build(self, cache, dict(arch=self.arch.options(), refn=refn, l2_stride=l2_stride,
+                                           laplacian=laplacian, probes=probes, fused=fused, joint=joint,
+                                           weighting=weighting, bweight=bweight, lr=lr, precision=precision,
+                                           ensemble=ensemble, lrs=self.lrs),
+                         lambda: self.build(lr, weighting, bweight))
+
+		#build: placeholders, subnetworks, losses and optimizers
+    def build(self, lr, weighting, bweight):
+        self.x = tf.placeholder(self.dtype, (None, 2)) # inner data
+        self.x_b = tf.placeholder(self.dtype, (None, 2)) # boundary data
 
         self.u_b = self.bsubnetwork(self.x_b, False)
-        self.u = self.bsubnetwork(self.x, True) + self.B(self.x) * self.subnetwork(self.x, False)
+        self.u = self.u_out(self.x, False)
 
-        self.bloss = tf.reduce_sum((self.tfexactsol(self.x_b)-self.u_b)**2)
+        self.bloss = sum_squares(self.tfexactsol(self.x_b)-self.u_b, self.loss_dtype)
         self.loss = self.loss_function()
 
         self.ploss = self.point_wise_loss()
 
 
 
-        var_list1 = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "boundary")
-        self.opt1 = tf.train.AdamOptimizer(learning_rate=0.001).minimize(self.bloss,var_list=var_list1)
-        var_list2 = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "inner")
-        self.opt2 = tf.train.AdamOptimizer(learning_rate=0.001).minimize(self.loss, var_list=var_list2)
+        self.lr = tf.Variable(lr, trainable=False, dtype=tf.float64, name="lr") # learning rate of the optimizers, see control.py
+        if self.ensemble > 1:
+            ensemble_step(self, lr)
+        elif not self.joint:    # the joint mode has its own optimizer (joint_step)
+            var_list1 = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "boundary")
+            self.optimizer1 = tf.train.AdamOptimizer(learning_rate=self.lr)
+            self.opt1 = self.optimizer1.minimize(self.bloss,var_list=var_list1)
+            var_list2 = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, "inner")
+            self.optimizer2 = tf.train.AdamOptimizer(learning_rate=self.lr)
+            self.opt2 = self.optimizer2.minimize(self.loss, var_list=var_list2)
+
+        if self.fused:
+            self.fused_ops, self.fused_l2 = fused_step(self, self.l2metric.points, self.l2metric.exact)
+        if self.joint:
+            self.joint_ops, self.balance, self.bweight = joint_step(self, weighting, bweight, self.lr)
         self.init = tf.global_variables_initializer()
 
 
@@ -311,45 +804,74 @@ class NNPDE2:
     def f(self, x):
         raise NotImplementedError
 
-    def loss_function(self):
-        deltah = compute_delta(self.u, self.x)
+    # residual: point-wise residual delta(u) - f on the inner points
+    def residual(self, u=None):
+        u = self.u if u is None else u
+        deltah = self.delta(u)
         delta = self.f(self.x)
-        res = tf.reduce_sum((deltah - delta) ** 2)
+        res = deltah - delta
+        assert_shape(res, (None,))
+        return res
+
+    def loss_function(self, u=None):
+        res = sum_squares(self.residual(u), self.loss_dtype)
         assert_shape(res, ())
         return res
 
     # end modification
 
-		#subnetwork defines a dense neural network on inner points with tanh activation and output dimensionality 256
+    # laplacian of u = u_out(x) with the method chosen at construction
+    def delta(self, u):
+        if self.laplacian == "forward":
+            return compute_delta_forward(self, self.x)
+        return compute_laplacian(u, self.u_out, self.x, self.d, self.laplacian, self.probes)
+
+		#subnetwork defines the dense neural network of self.arch on inner points (see architecture.py)
     def subnetwork(self, x, reuse = False):
+        if self.ensemble > 1:
+            with tf.variable_scope("inner", reuse=tf.AUTO_REUSE):
+                return ensemble_network(x, self.ensemble, self.arch, "")
         with tf.variable_scope("inner"):
-            for i in range(self.N):
-                x = tf.layers.dense(x, 256, activation=tf.nn.tanh, name="dense{}".format(i), reuse=reuse) #reuse: boolean indicating
-            x = tf.layers.dense(x, 1, activation=None, name="last", reuse=reuse)          # whether to reuse weight of a previous layer
-            x = tf.squeeze(x, axis=1)
+            x = dense_network(x, self.arch, "", reuse) #reuse: boolean indicating whether to reuse weight of a previous layer
             assert_shape(x, (None,))
         return x
 
-		#subnetwork defines a dense neural network on boundary points with tanh activation and output dimensionality 256
+		#bsubnetwork defines the dense neural network of self.arch on boundary points
     def bsubnetwork(self, x, reuse = False):
+        if self.ensemble > 1:
+            with tf.variable_scope("boundary", reuse=tf.AUTO_REUSE):
+                return ensemble_network(x, self.ensemble, self.arch, "b")
         with tf.variable_scope("boundary"):
-            for i in range(self.N):
-                x = tf.layers.dense(x, 256, activation=tf.nn.tanh, name="bdense{}".format(i), reuse=reuse)
-            x = tf.layers.dense(x, 1, activation=None, name="blast", reuse=reuse)
-            x = tf.squeeze(x, axis=1)
+            x = dense_network(x, self.arch, "b", reuse)
             assert_shape(x, (None,))
         return x
 
+		#overall solution: boundary subnetwork lifted by B(x) times the inner subnetwork
+    def u_out(self, x, reuse=True):
+        return self.bsubnetwork(x, True) + self.B(x) * self.subnetwork(x, reuse)
+
+		#evaluate: fields "u", "delta", "dx", "dy" on a large point source (array, memmap or generator) in chunks,
+		#          optionally streamed to the .npy memmap `out` (see inference.py)
+    def evaluate(self, sess, points, fields=("u",), out=None, n=None, chunk=16384, threads=1):
+        return inference.evaluate(self, sess, points, fields, out, n, chunk, threads)
+
     def point_wise_loss(self):
-        deltah = compute_delta(self.u, self.x)
+        deltah = self.delta(self.u)
         delta = self.f(self.x)
         res = tf.abs(deltah - delta)
         assert_shape(res, (None,))
         return res
 
+    #figure: the figure of plot_exactsol and visualize, created once and reused
+    def figure(self):
+        if getattr(self, "fig", None) is None:
+            self.fig = plotting()[0].figure()
+        return self.fig
+
     def plot_exactsol(self):
+        _, cm, _ = plotting()
         Z = self.exactsol(self.X, self.Y)
-        ax = self.fig.gca(projection='3d')
+        ax = self.figure().add_subplot(111, projection='3d')
         ax.plot_surface(self.X, self.Y, Z, rstride=1, cstride=1, cmap=cm.summer,
                         linewidth=0, antialiased=False, alpha=1.0)
         ax.set_xlim(0, 1)
@@ -357,20 +879,21 @@ class NNPDE2:
         ax.set_xlabel('$x$')
         ax.set_ylabel('$y$')
 				
+    #visualize: interactive plot, synchronous (render.Renderer draws the frames in the background)
     def visualize(self, sess, showonlysol=False, i=None, savefig=None):
 		 
-        x = np.linspace(0, 1, self.refn)
-        y = np.linspace(0, 1, self.refn)
-        [X, Y] = np.meshgrid(x, y)
+        X, Y = self.X, self.Y
 
         uh = sess.run(self.u, feed_dict={self.x: self.refX})
         Z = uh.reshape((self.refn, self.refn))
 
         uhref = self.exactsol(X, Y)
+        plt, cm, drawnow = plotting()
+        fig = self.figure()
 
         def draw():
-            self.fig = plt.figure()
-            ax = self.fig.gca(projection='3d')
+            fig.clf()
+            ax = fig.add_subplot(111, projection='3d')
 
             if not showonlysol:
                 ax.plot_surface(X, Y, uhref, rstride=1, cstride=1, cmap=cm.autumn,
@@ -387,42 +910,72 @@ class NNPDE2:
             if i:
                 plt.title("Iteration {}".format(i))
             if savefig:
-                plt.savefig("{}/fig{}".format(savefig,0 if i is None else i))			
+                fig.savefig("{}/fig{}".format(savefig,0 if i is None else i))			
 
         drawnow(draw)
 
+    # fixed points added to every interior batch
+    def extra_points(self):
+        return None
+
+    #joint_train: one step of the joint optimizer (weight balanced first when due)
+    def joint_train(self, sess, bX, X):
+        prof = self.profiler
+        feed = {self.x_b: bX, self.x: X}
+        if self.balance is not None and len(self.rloss) % self.balance_every == 0:
+            with prof.phase("balance"):
+                sess.run(self.balance, feed_dict=feed, **prof.options("balance"))
+        with prof.phase("joint"):
+            _, bloss, loss = sess.run(self.joint_ops, feed_dict=feed, **prof.options("joint"))
+        return bloss, loss
+
     def train(self, sess, i=-1):
 			  #random (boundary) coordinates
         # self.X = rectspace(0,0.5,0.,0.5,self.n)
-        bX = np.zeros((4*self.batch_size, 2))
-        bX[:self.batch_size,0] = np.random.rand(self.batch_size)
-        bX[:self.batch_size,1] = 0.0
-
-        bX[self.batch_size:2*self.batch_size, 0] = np.random.rand(self.batch_size)
-        bX[self.batch_size:2*self.batch_size, 1] = 1.0
-
-        bX[2*self.batch_size:3*self.batch_size, 0] = 0.0
-        bX[2*self.batch_size:3*self.batch_size, 1] = np.random.rand(self.batch_size)
-
-        bX[3*self.batch_size:4*self.batch_size, 0] = 1.0
-        bX[3 * self.batch_size:4 * self.batch_size, 1] = np.random.rand(self.batch_size)
-
-        bloss = sess.run([self.bloss], feed_dict={self.x_b: bX})[0]
-        # if the loss is small enough, stop training on the boundary
-        if bloss>1e-5:
-            for _ in range(5):
-                _, bloss = sess.run([self.opt1, self.bloss], feed_dict={self.x_b: bX})
-
-        X = np.random.rand(self.batch_size, 2)
-        _, loss = sess.run([self.opt2, self.loss], feed_dict={self.x: X})
+        if self.ensemble > 1:
+            return ensemble_train(self, sess, i)
+        prof = self.profiler
+        prof.start(i)
+        with prof.phase("sampling"):
+            bX, X = self.sampler.next(sess)
+        evaluate = self.l2metric.due()
+
+        if self.joint:
+            bloss, loss = self.joint_train(sess, bX, X)
+            with prof.phase("rl2"):
+                l2 = self.l2metric.evaluate(sess, self.u, self.x) if evaluate else None
+        elif self.fused:
+            fetches = self.fused_ops + ([self.fused_l2] if evaluate else [])
+            with prof.phase("fused"):
+                res = sess.run(fetches, feed_dict={self.x_b: bX, self.x: X}, **prof.options("fused"))
+            bloss, loss = res[1], res[2]
+            l2 = res[3] if evaluate else None
+        else:
+            with prof.phase("bloss"):
+                bloss = sess.run([self.bloss], feed_dict={self.x_b: bX}, **prof.options("bloss"))[0]
+            # if the loss is small enough, stop training on the boundary
+            if bloss>self.btol:
+                with prof.phase("opt1"):
+                    for _ in range(5):
+                        _, bloss = sess.run([self.opt1, self.bloss], feed_dict={self.x_b: bX},
+                                            **prof.options("opt1"))
+                prof.count("opt1 steps", 5)
+
+            with prof.phase("opt2"):
+                _, loss = sess.run([self.opt2, self.loss], feed_dict={self.x: X}, **prof.options("opt2"))
+
+            #approximate solution on the reference grid
+            if evaluate:
+                with prof.phase("rl2"):
+                    l2 = self.l2metric.evaluate(sess, self.u, self.x)
+            else:
+                l2 = None
 
 
         ########## record loss ############
         self.rbloss.append(bloss)
         self.rloss.append(loss)
-        uh = sess.run(self.u, feed_dict={self.x: self.refX}) #approximate solutions at each iteration
-        Z = uh.reshape((self.refn, self.refn))
-        uhref = self.exactsol(self.X, self.Y)
-        self.rl2.append( np.sqrt(np.mean((Z-uhref)**2)) )
+        if evaluate:
+            self.rl2.append(l2)
+            self.rl2_iter.append(len(self.rloss) - 1)
         ########## record loss ############
-
@@ -6,20 +6,33 @@ Created on Tue Aug  4 12:13:34 2020
 """
 
 from problems import *
+from matplotlib import pyplot as plt
+from checkpoint import Checkpointer, resume
+from control import Controller, PlateauLR
+from render import Renderer
 
 dir = 'p4'
+max_iter = 1001 # iterations 0..1000, the former hard stop; the controller may stop the run earlier
 npde = ProblemPeak_BD(64, 3, 50) # works very well
 #npde.plot_exactsol()
 #plt.show()
 #exit(0)
+# halve the learning rate on loss plateaus, stop before max_iter when the loss stops improving or after one hour
+ctl = Controller(npde, PlateauLR(patience=500), monitor="loss", patience=2000, budget=3600)
+ckpt = Checkpointer(npde, dir + '/ckpt', every=100, controller=ctl) # restart from the last checkpoint if interrupted
+renderer = Renderer(npde, dir)
 with tf.Session() as sess:
     sess.run(npde.init)
-    for i in range(10000):
-        if( i>1000 ):
-            break
+    for i in range(resume(npde, sess, dir + '/ckpt', ctl), max_iter):
         npde.train(sess, i)
+        stop = ctl.step(sess, i)
+        ckpt.step(sess, i)
+        if stop:
+            break
         if i%100==0:
-            npde.visualize(sess, False, i=i, savefig=dir)
+            renderer.snapshot(sess, i) # frames drawn in the background
+ckpt.close()
+renderer.close()
 
 
 plt.close('all')
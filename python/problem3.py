@@ -6,8 +6,12 @@ Created on Tue Aug  4 12:25:53 2020
 """
 
 from problems import *
+from matplotlib import pyplot as plt
+from checkpoint import Checkpointer, resume
+from control import Controller, PlateauLR
 
 dir = 'p3'
+max_iter = 1001 # iterations 0..1000, the former hard stop; the controller may stop the run earlier
 
 rblossFull = []
 rlossFull = []
@@ -15,16 +19,22 @@ rl2Full = []
 
 for layer in [1,2,3]:
 		npde = ProblemBLSingularity_BD(64, layer, 50) # works very well
+		ctl = Controller(npde, PlateauLR(patience=500), monitor="loss", patience=2000, budget=3600)
+		ckpt = Checkpointer(npde, dir + '/ckpt%d' % layer, every=100, controller=ctl)
 		with tf.Session() as sess:
 			sess.run(npde.init)
-			for i in range(20000):
-				if( i>1000 ):
-					break
+			for i in range(resume(npde, sess, dir + '/ckpt%d' % layer, ctl), max_iter):
 				npde.train(sess, i)
+				stop = ctl.step(sess, i)
+				ckpt.step(sess, i)
+				if stop:
+					break
 			#		if i%100==0:
 			#			npde.visualize(sess, False, i=i, savefig=dir)
 				
 		
+		ckpt.close()
+		tf.reset_default_graph()
 		rblossFull.append(npde.rbloss)
 		rlossFull.append(npde.rloss)
 		rl2Full.append(npde.rl2)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:34:47 2026
+
+@author: beacr
+"""
+
+# Per-phase profiling of train(). The base classes time their phases (sampling, bloss probe, opt1, opt2,
+# rl2, fused or joint step) through npde.profiler, which is a NullProfiler doing nothing by default; setting
+# npde.profiler = Profiler() switches the timers on for any problem class, and the iterations listed in
+# `trace` are also traced by TensorFlow (RunMetadata, one Chrome trace per sess.run in <folder>).
+#
+#   npde.profiler = Profiler(trace=[100], folder="p1/trace")
+#   for i in range(iterations):
+#       npde.train(sess, i)
+#   print(npde.profiler.report())
+
+import os
+import time
+
+import numpy as np
+
+_NO_OPTIONS = {}
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+
+#NullProfiler: the disabled profiler, no timing and no run options
+class NullProfiler:
+    enabled = False
+
+    def start(self, i):
+        pass
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def options(self, name):
+        return _NO_OPTIONS
+
+    def count(self, name, n=1):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler.times.setdefault(self.name, []).append(time.perf_counter() - self.t0)
+        self.profiler.flush()
+        return False
+
+
+#Profiler: wall time of every phase of every iteration, counters and TF traces of selected iterations
+class Profiler:
+    enabled = True
+
+    def __init__(self, trace=(), folder="trace"):
+        self.trace = set(trace)     # iterations traced with RunMetadata
+        self.folder = folder
+        self.times = {}
+        self.counters = {}
+        self.iteration = None
+        self.t0 = None
+        self.pending = None         # (name, RunMetadata) of the last traced run
+
+    def start(self, i):
+        self.iteration = i
+        if self.t0 is None:
+            self.t0 = time.perf_counter()
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    #options: keyword arguments of sess.run; on traced iterations the trace is written after the run,
+    #         when the next sess.run asks for options or at the end of the phase
+    def options(self, name):
+        if self.iteration not in self.trace:
+            return _NO_OPTIONS
+        import tensorflow as tf
+        self.flush()
+        metadata = tf.RunMetadata()
+        self.pending = (name, metadata)
+        return {"options": tf.RunOptions(trace_level=tf.RunOptions.FULL_TRACE), "run_metadata": metadata}
+
+    #flush: writes the trace of the last traced run to <folder>/trace-<iteration>-<phase>-<k>.json
+    def flush(self):
+        if self.pending is None:
+            return
+        from tensorflow.python.client import timeline
+        name, metadata = self.pending
+        self.pending = None
+        self.count("traces")
+        os.makedirs(self.folder, exist_ok=True)
+        filename = os.path.join(self.folder, "trace-{}-{}-{}.json".format(self.iteration, name,
+                                                                          self.counters["traces"]))
+        with open(filename, "w") as file:
+            file.write(timeline.Timeline(metadata.step_stats).generate_chrome_trace_format())
+
+    #summary: calls, total and percentiles (seconds) of every phase
+    def summary(self):
+        res = {}
+        for name, t in self.times.items():
+            t = np.array(t)
+            res[name] = {"calls": len(t), "total": t.sum(), "mean": t.mean(), "p50": np.percentile(t, 50),
+                         "p90": np.percentile(t, 90), "max": t.max()}
+        return res
+
+    def report(self):
+        self.flush()
+        summary = self.summary()
+        elapsed = time.perf_counter() - self.t0 if self.t0 is not None else 0.0
+        lines = ["{:>10} {:>8} {:>10} {:>10} {:>10} {:>10} {:>7}".format(
+            "phase", "calls", "total[s]", "mean[ms]", "p50[ms]", "p90[ms]", "share")]
+        for name, s in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+            lines.append("{:>10} {:>8} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f} {:>6.1f}%".format(
+                name, s["calls"], s["total"], 1e3 * s["mean"], 1e3 * s["p50"], 1e3 * s["p90"],
+                100 * s["total"] / elapsed if elapsed > 0 else 0.0))
+        for name, n in sorted(self.counters.items()):
+            lines.append("{:>10} {:>8}".format(name, n))
+        return "\n".join(lines)
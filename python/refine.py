@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:05:48 2026
+
+@author: beacr
+"""
+
+# Second-order refinement after the Adam iterations: each subnetwork in turn (boundary on bloss, then inner
+# on loss) is minimised by scipy.optimize on a fixed collocation set, with the weights flattened into one
+# float64 vector. "L-BFGS-B" uses a line search on the loss and gradient; "trust-ncg" and "Newton-CG" also
+# use exact Hessian-vector products of the loss. Every iteration is recorded like a train() step (rbloss,
+# rloss and rl2 when the l2 cadence is due), so the histories continue from the Adam phase.
+#
+#   refiner = Refiner(npde, "L-BFGS-B", batches=16)      # build before the session, like the optimizers
+#   with tf.Session() as sess:
+#       sess.run(npde.init)
+#       for i in range(2000):                            # Adam warm-up
+#           npde.train(sess, i)
+#       refiner.run(sess)
+
+import numpy as np
+import scipy.optimize
+import tensorflow as tf
+
+METHODS = ("L-BFGS-B", "trust-ncg", "Newton-CG")
+
+
+#FlatLoss: loss, gradient, Hessian-vector product and assignment of a list of variables as flat vectors
+class FlatLoss:
+    def __init__(self, loss, var_list, hessian=False):
+        self.vars = var_list
+        self.shapes = [v.get_shape().as_list() for v in var_list]
+        self.sizes = [int(np.prod(s)) for s in self.shapes]
+        self.loss = tf.cast(loss, tf.float64)
+
+        def flat(tensors):
+            return tf.concat([tf.reshape(tf.cast(t, tf.float64), [-1]) for t in tensors], 0)
+
+        self.value = flat(var_list)
+        grads = tf.gradients(loss, var_list)
+        self.grad = flat(grads)
+        self.w = tf.placeholder(tf.float64, (sum(self.sizes),))
+        parts = tf.split(self.w, self.sizes)
+        self.assign = tf.group(*[v.assign(tf.cast(tf.reshape(p, s), v.dtype))
+                                 for v, p, s in zip(var_list, parts, self.shapes)])
+        if hessian:
+            self.v = tf.placeholder(tf.float64, (sum(self.sizes),))
+            gv = tf.add_n([tf.reduce_sum(g * tf.cast(tf.reshape(p, s), g.dtype))
+                           for g, p, s in zip(grads, tf.split(self.v, self.sizes), self.shapes)])
+            self.hvp = flat(tf.gradients(gv, var_list))
+
+
+#Refiner: full-batch second-order stage of NNPDE2 and NNPDE_ND problems
+class Refiner:
+    def __init__(self, npde, method="L-BFGS-B", batches=16, maxiter=1000, gtol=1e-9, ftol=1e-12,
+                 memory=20, stages=("boundary", "inner")):
+        if method not in METHODS:
+            raise ValueError("unknown method {}, expected one of {}".format(method, METHODS))
+        if not hasattr(npde, "bloss"):
+            raise ValueError("the refinement needs a problem with a boundary subnetwork (NNPDE2, NNPDE_ND)")
+        self.npde = npde
+        self.method = method
+        self.batches = batches      # sampler batches in the fixed collocation set
+        self.maxiter = maxiter      # iterations per stage
+        self.gtol = gtol
+        self.ftol = ftol
+        self.memory = memory        # L-BFGS correction pairs
+        self.stages = stages
+        hessian = method != "L-BFGS-B"
+        self.flat = {"boundary": FlatLoss(npde.bloss, tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES,
+                                                                        "boundary"), hessian),
+                     "inner": FlatLoss(npde.loss, tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES,
+                                                                    "inner"), hessian)}
+        self.results = {}
+
+    #collocation: fixed boundary and interior points made of `batches` sampler batches
+    def collocation(self, sess):
+        bXs, Xs = [], []
+        for _ in range(self.batches):
+            bX, X = self.npde.sampler.next(sess)
+            bXs.append(bX.copy())       # the sampler buffers are reused
+            Xs.append(X.copy())
+        return np.concatenate(bXs), np.concatenate(Xs)
+
+    def _options(self):
+        if self.method == "L-BFGS-B":
+            return {"maxiter": self.maxiter, "gtol": self.gtol, "ftol": self.ftol, "maxcor": self.memory}
+        if self.method == "trust-ncg":
+            return {"maxiter": self.maxiter, "gtol": self.gtol}
+        return {"maxiter": self.maxiter, "xtol": self.ftol}
+
+    def _record(self, sess, feed):
+        npde = self.npde
+        bloss, loss = sess.run([npde.bloss, npde.loss], feed_dict=feed)
+        npde.rbloss.append(bloss)
+        npde.rloss.append(loss)
+        if npde.l2metric.due():
+            npde.rl2.append(npde.l2metric.evaluate(sess, npde.u, npde.x))
+            if hasattr(npde, "rl2_ci"):
+                npde.rl2_ci.append(npde.l2metric.ci)
+            npde.rl2_iter.append(len(npde.rloss) - 1)
+
+    #stage: minimises one subnetwork on the fixed points; returns the scipy OptimizeResult
+    def stage(self, sess, name, feed):
+        flat = self.flat[name]
+        current = [None]        # weights currently loaded in the variables
+
+        def load(w):
+            if current[0] is None or not np.array_equal(w, current[0]):
+                sess.run(flat.assign, feed_dict={flat.w: w})
+                current[0] = w.copy()
+
+        def fun(w):
+            load(w)
+            loss, grad = sess.run([flat.loss, flat.grad], feed_dict=feed)
+            return loss, grad
+
+        def hessp(w, v):
+            load(w)
+            return sess.run(flat.hvp, feed_dict={**feed, flat.v: v})
+
+        def callback(w, *args):
+            load(w)
+            self._record(sess, feed)
+
+        w0 = sess.run(flat.value)
+        res = scipy.optimize.minimize(fun, w0, jac=True, method=self.method,
+                                      hessp=None if self.method == "L-BFGS-B" else hessp,
+                                      callback=callback, options=self._options())
+        load(res.x)
+        return res
+
+    #run: refines the stages in order on one fixed collocation set; returns the results by stage
+    def run(self, sess, verbose=True):
+        bX, X = self.collocation(sess)
+        feed = {self.npde.x_b: bX, self.npde.x: X}
+        for name in self.stages:
+            res = self.stage(sess, name, feed)
+            self.results[name] = res
+            if verbose:
+                print("{} {}: {} iterations, loss={}, {}".format(self.method, name, res.nit, res.fun,
+                                                                  res.message))
+        return self.results
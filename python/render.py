@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:21:09 2026
+
+@author: beacr
+"""
+
+# Headless rendering of the approximate solution of the 2D problems during training. snapshot() evaluates the
+# network on the reference grid and hands the array to a background thread, which saves it to
+# <folder>/snap-<i>.npy and draws it with the Agg canvas on a single reused figure into <folder>/fig<i>.png;
+# training never waits for matplotlib, and an error of the thread is raised by the next snapshot() or close().
+# With render=False only the arrays are saved and the frames can be drawn afterwards with render_all
+# (python render.py <folder>).
+#
+#   renderer = Renderer(npde, "p1")
+#   for i in range(iterations):
+#       npde.train(sess, i)
+#       if i % 100 == 0:
+#           renderer.snapshot(sess, i)
+#   renderer.close()
+
+import glob
+import os
+import queue
+import sys
+import threading
+
+import numpy as np
+from matplotlib import cm
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from mpl_toolkits.mplot3d import Axes3D
+
+
+#Frames: one figure and 3D axes drawing the surfaces of the snapshots of a grid
+class Frames:
+    def __init__(self, X, Y, exact=None, lines=50):
+        self.X = X
+        self.Y = Y
+        self.exact = exact
+        self.stride = max(1, X.shape[0] // lines)     # at most `lines` mesh lines per direction
+        self.fig = Figure(figsize=(8, 6))
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(111, projection="3d")
+
+    def draw(self, Z, filename, i=None):
+        ax = self.ax
+        ax.cla()
+        if self.exact is not None:
+            ax.plot_surface(self.X, self.Y, self.exact, rstride=self.stride, cstride=self.stride,
+                            cmap=cm.autumn, linewidth=0, antialiased=False, alpha=0.3)
+        ax.plot_surface(self.X, self.Y, Z, rstride=self.stride, cstride=self.stride, cmap=cm.summer,
+                        linewidth=0, antialiased=False, alpha=0.5)
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        ax.set_zlim(0, 1.1)
+        ax.set_xlabel('$x$')
+        ax.set_ylabel('$y$')
+        ax.set_title("" if i is None else "Iteration {}".format(i))
+        self.fig.savefig(filename)
+
+
+class Renderer:
+    def __init__(self, npde, folder, showonlysol=False, render=True):
+        self.npde = npde
+        self.folder = folder
+        self.render = render
+        os.makedirs(folder, exist_ok=True)
+        self.exact = npde.exactsol(npde.X, npde.Y)      # computed once
+        np.savez(os.path.join(folder, "grid.npz"), X=npde.X, Y=npde.Y, exact=self.exact)
+        self.frames = Frames(npde.X, npde.Y, None if showonlysol else self.exact) if render else None
+
+        self.queue = queue.Queue()
+        self.error = None       # exception that stopped the worker thread
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+    #snapshot: approximate solution on the reference grid, saved and drawn in the background
+    def snapshot(self, sess, i):
+        self._check()
+        uh = sess.run(self.npde.u, feed_dict={self.npde.x: self.npde.refX})
+        self.queue.put((i, uh.reshape(self.npde.X.shape)))
+
+    def _work(self):
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    return
+                i, Z = item
+                np.save(os.path.join(self.folder, "snap-{}.npy".format(i)), Z)
+                if self.frames is not None:
+                    self.frames.draw(Z, os.path.join(self.folder, "fig{}.png".format(i)), i)
+        except Exception as e:
+            self.error = e
+
+    #_check: raises the error of the worker thread, if it failed
+    def _check(self):
+        if self.error is not None:
+            raise RuntimeError("renderer failed: {!r}".format(self.error)) from self.error
+
+    #close: waits at most `timeout` seconds for the pending frames
+    def close(self, timeout=600):
+        if self.thread.is_alive():
+            self.queue.put(None)
+        self.thread.join(timeout)
+        self._check()
+        if self.thread.is_alive():
+            raise RuntimeError("renderer still busy after {}s".format(timeout))
+
+
+#snapshots: snapshot files of a folder, sorted by iteration
+def snapshots(folder):
+    files = glob.glob(os.path.join(folder, "snap-*.npy"))
+    return sorted(files, key=lambda f: int(os.path.basename(f)[5:-4]))
+
+#render_all: draws fig<i>.png for every saved snapshot of a folder
+def render_all(folder, showonlysol=False):
+    grid = np.load(os.path.join(folder, "grid.npz"))
+    frames = Frames(grid["X"], grid["Y"], None if showonlysol else grid["exact"])
+    files = snapshots(folder)
+    for f in files:
+        i = int(os.path.basename(f)[5:-4])
+        frames.draw(np.load(f), os.path.join(folder, "fig{}.png".format(i)), i)
+    return len(files)
+
+
+if __name__ == "__main__":
+    for folder in sys.argv[1:]:
+        print("{}: {} frames".format(folder, render_all(folder)))
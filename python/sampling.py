@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:52:10 2026
+
+@author: beacr
+"""
+
+import queue
+import threading
+
+import numpy as np
+
+
+#CollocationSampler: batches of collocation points in [0,1]^d, as a pair (bX, X) of
+#  - bX: batch_size random points on each of the 2d faces (face 2j: x_j = 1, face 2j+1: x_j = 0)
+#  - X:  batch_size random interior points, followed by the fixed `extra` points if given
+#  generated into preallocated buffers; with prefetch > 0 a background thread keeps up to `prefetch`
+#  batches ready while the current step runs. A batch stays valid until the next call of next();
+#  the session argument of next() is only used by the adaptive sampler.
+class CollocationSampler:
+    def __init__(self, d, batch_size, extra=None, prefetch=2, seed=None, dtype=np.float64):
+        if seed is None:
+            seed = np.random.randint(2**31)    # follows np.random.seed
+        self.rng = np.random.default_rng(seed)
+        self.d = d
+        self.batch_size = batch_size
+        self.prefetch = prefetch
+
+        nb = 2 * d * batch_size
+        block = np.arange(nb) // batch_size
+        self.rows = np.arange(nb)
+        self.face = block // 2                             # coordinate fixed on each row
+        self.value = (1 - block % 2).astype(dtype)         # to 1 or 0
+
+        extra = np.zeros((0, d)) if extra is None else np.asarray(extra)
+        self.buffers = []
+        for _ in range(prefetch + 2):
+            X = np.empty((batch_size + len(extra), d), dtype)
+            X[batch_size:] = extra
+            self.buffers.append((np.empty((nb, d), dtype), X))
+
+        self.state = self.rng.bit_generator.state      # state after the last batch handed out
+        self.current = None
+        self.thread = None
+        if prefetch > 0:
+            self._start()
+
+    def _fill(self, k):
+        bX, X = self.buffers[k]
+        self.rng.random(out=bX, dtype=bX.dtype)
+        bX[self.rows, self.face] = self.value
+        self.rng.random(out=X[:self.batch_size], dtype=X.dtype)
+        return k, self.rng.bit_generator.state
+
+    def _start(self):
+        self.free = queue.Queue()
+        self.ready = queue.Queue()
+        self.stop = threading.Event()
+        for k in range(len(self.buffers)):
+            self.free.put(k)
+        self.thread = threading.Thread(target=self._produce, daemon=True)
+        self.thread.start()
+
+    def _produce(self):
+        while True:
+            k = self.free.get()
+            if self.stop.is_set():
+                return
+            self.ready.put(self._fill(k))
+
+    def next(self, sess=None):
+        if self.thread is None:
+            k = 0 if self.current is None else (self.current + 1) % len(self.buffers)
+            k, self.state = self._fill(k)
+        else:
+            if self.current is not None:
+                self.free.put(self.current)
+            k, self.state = self.ready.get()
+        self.current = k
+        return self.buffers[k]
+
+    def close(self):
+        if self.thread is not None:
+            self.stop.set()
+            self.free.put(None)
+            self.thread.join()
+            self.thread = None
+
+    #get_state/set_state: the random state for the next batch, for checkpoints
+    def get_state(self):
+        return self.state
+
+    def set_state(self, state):
+        self.close()
+        self.rng.bit_generator.state = state
+        self.state = state
+        self.current = None
+        if self.prefetch > 0:
+            self._start()
+
+
+#EnsembleSampler: independent batches for the K members of ensemble mode, stacked member after member
+#                 (boundary points of all members, then interior points of all members); member k draws from
+#                 its own CollocationSampler with seed `seed + k`
+class EnsembleSampler:
+    def __init__(self, d, batch_size, K, extra=None, prefetch=2, seed=None, dtype=np.float64):
+        if seed is None:
+            seed = np.random.randint(2**31)
+        self.samplers = [CollocationSampler(d, batch_size, extra, prefetch, seed + k, dtype) for k in range(K)]
+        self.nb = 2 * d * batch_size
+        self.ni = batch_size + (0 if extra is None else len(extra))
+        self.bX = np.empty((K * self.nb, d), dtype)
+        self.X = np.empty((K * self.ni, d), dtype)
+
+    def next(self, sess=None):
+        for k, sampler in enumerate(self.samplers):
+            bX, X = sampler.next()
+            self.bX[k * self.nb:(k + 1) * self.nb] = bX
+            self.X[k * self.ni:(k + 1) * self.ni] = X
+        return self.bX, self.X
+
+    def close(self):
+        for sampler in self.samplers:
+            sampler.close()
+
+    def get_state(self):
+        return [sampler.get_state() for sampler in self.samplers]
+
+    def set_state(self, state):
+        for sampler, s in zip(self.samplers, state):
+            sampler.set_state(s)
+
+
+#AdaptiveSampler: residual-based adaptive sampling of the interior points. Every `every` batches the
+#  point-wise residual ploss is evaluated (in chunks) on `pool` fresh uniform candidates; each batch then
+#  takes a fraction `uniform` of uniform points and draws the rest from the candidates with probability
+#  proportional to the residual, followed by the fixed npde.extra_points() as in CollocationSampler. The
+#  boundary points stay uniform.
+#
+#   npde.sampler = AdaptiveSampler(npde, pool=10000, every=100, uniform=0.5)
+class AdaptiveSampler:
+    def __init__(self, npde, pool=10000, every=100, uniform=0.5, chunk=8192, seed=None):
+        if seed is None:
+            seed = np.random.randint(2**31)
+        self.npde = npde
+        # point-wise residual (NNPDE2 builds it in its constructor, NNPDE_ND only when needed)
+        self.ploss = npde.ploss if hasattr(npde, "ploss") else npde.point_wise_loss()
+        dtype = npde.dtype.as_numpy_dtype
+        self.uniform_sampler = CollocationSampler(npde.d, npde.batch_size, prefetch=0, seed=seed, dtype=dtype)
+        self.rng = np.random.default_rng(seed + 1)
+        self.pool = pool
+        self.every = every
+        self.chunk = chunk
+        self.nu = int(round(uniform * npde.batch_size))    # uniform points per batch
+        extra = npde.extra_points()
+        extra = np.zeros((0, npde.d)) if extra is None else np.asarray(extra)
+        self.X = np.empty((npde.batch_size + len(extra), npde.d), dtype)
+        self.X[npde.batch_size:] = extra
+        self.calls = 0
+        self.candidates = None
+        self.p = None
+
+    def refresh(self, sess):
+        C = self.rng.random((self.pool, self.npde.d))
+        r = np.concatenate([sess.run(self.ploss, feed_dict={self.npde.x: C[a:a + self.chunk]})
+                            for a in range(0, self.pool, self.chunk)])
+        r = np.where(np.isfinite(r), r, 0.0)
+        self.candidates = C
+        self.p = r / r.sum() if r.sum() > 0 else None
+
+    def next(self, sess=None):
+        if sess is not None and self.calls % self.every == 0:
+            self.refresh(sess)
+        self.calls += 1
+        bX, U = self.uniform_sampler.next()
+        n = len(U)          # batch_size, the extra points stay at the end of self.X
+        self.X[:self.nu] = U[:self.nu]
+        if self.p is None:
+            self.X[self.nu:n] = U[self.nu:]
+        else:
+            k = self.rng.choice(self.pool, n - self.nu, p=self.p)
+            self.X[self.nu:n] = self.candidates[k]
+        return bX, self.X
+
+    def close(self):
+        pass
+
+    #get_state/set_state: random states, counter and candidate pool, for checkpoints
+    def get_state(self):
+        return {"uniform": self.uniform_sampler.get_state(), "rng": self.rng.bit_generator.state,
+                "calls": self.calls,
+                "candidates": None if self.p is None else self.candidates.tolist(),
+                "p": None if self.p is None else self.p.tolist()}
+
+    def set_state(self, state):
+        self.uniform_sampler.set_state(state["uniform"])
+        self.rng.bit_generator.state = state["rng"]
+        self.calls = state["calls"]
+        self.candidates = None if state["candidates"] is None else np.array(state["candidates"])
+        self.p = None if state["p"] is None else np.array(state["p"])
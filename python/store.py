@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:41:55 2026
+
+@author: beacr
+"""
+
+# Columnar binary store of the per-iteration metrics of training runs. Every run (config id) has its own
+# folder <path>/config-<id> with one raw little-endian file per column, appended in chunks while training;
+# load_metrics memory-maps the columns back. l2 is NaN at the iterations where it was not evaluated. A
+# resumed run truncates the rows back to its checkpoint, so the writer is flushed whenever a checkpoint is
+# taken (see sweep.run_config); rows missing before the resumed iteration are reported with a warning.
+#
+#   writer = MetricsWriter(path, config)
+#   for i in range(iterations):
+#       npde.train(sess, i)
+#       writer.record(npde, i)
+#   writer.close()
+#   m = load_metrics(path, config)          # m["iteration"], m["bloss"], m["loss"], m["l2"], m["time"]
+
+import glob
+import os
+import time
+import warnings
+
+import numpy as np
+
+COLUMNS = (("iteration", "<i8"), ("bloss", "<f8"), ("loss", "<f8"), ("l2", "<f8"), ("time", "<f8"),
+           ("config", "<i8"))
+
+def _file(folder, name):
+    return os.path.join(folder, name + ".bin")
+
+#_rows: number of complete rows of a run folder (columns may differ in length after a crash)
+def _rows(folder):
+    return min(os.path.getsize(_file(folder, name)) // np.dtype(dtype).itemsize
+               if os.path.exists(_file(folder, name)) else 0 for name, dtype in COLUMNS)
+
+
+#_last: last entry of the history `name` of npde, NaN if the problem has no such history
+def _last(npde, name):
+    history = getattr(npde, name, None)
+    return history[-1] if history else np.nan
+
+
+class MetricsWriter:
+    def __init__(self, path, config=0, start=0, chunk=1000):
+        self.folder = os.path.join(path, "config-{}".format(config))
+        os.makedirs(self.folder, exist_ok=True)
+        self.config = config
+
+        # drop incomplete rows and, when resuming, the rows from iteration `start` on
+        n = _rows(self.folder)
+        it = np.fromfile(_file(self.folder, "iteration"), "<i8", count=n) if n else np.zeros(0, "<i8")
+        n = int(np.searchsorted(it, start))
+        if start > 0 and (n == 0 or it[n - 1] != start - 1):
+            warnings.warn("metrics of {} lost before the resumed iteration {}: rows end at iteration {}".format(
+                self.folder, start, it[n - 1] if n else None))
+        last = np.fromfile(_file(self.folder, "time"), "<f8", count=n)[-1] if n else 0.0
+        for name, dtype in COLUMNS:
+            with open(_file(self.folder, name), "ab") as file:
+                file.truncate(n * np.dtype(dtype).itemsize)
+
+        self.files = {name: open(_file(self.folder, name), "ab") for name, _ in COLUMNS}
+        self.buffer = {name: np.empty(chunk, dtype) for name, dtype in COLUMNS}
+        self.n = 0
+        self.t0 = time.time() - last      # wall time continues across resumes
+
+    def append(self, iteration, bloss, loss, l2=np.nan):
+        row = (iteration, bloss, loss, l2, time.time() - self.t0, self.config)
+        for (name, _), value in zip(COLUMNS, row):
+            self.buffer[name][self.n] = value
+        self.n += 1
+        if self.n == len(self.buffer["iteration"]):
+            self.flush()
+
+    #record: last iteration of a problem (l2 only if it was evaluated at that iteration, bloss and l2 NaN for
+    #        the problems without these histories, as NNPDE)
+    def record(self, npde, i):
+        rl2_iter = getattr(npde, "rl2_iter", None)
+        evaluated = bool(rl2_iter) and rl2_iter[-1] == len(npde.rloss) - 1
+        self.append(i, _last(npde, "rbloss"), npde.rloss[-1], npde.rl2[-1] if evaluated else np.nan)
+
+    def flush(self):
+        for name, _ in COLUMNS:
+            self.buffer[name][:self.n].tofile(self.files[name])
+            self.files[name].flush()
+        self.n = 0
+
+    def close(self):
+        self.flush()
+        for file in self.files.values():
+            file.close()
+
+
+#configs: ids of the runs in a store
+def configs(path):
+    return sorted(int(os.path.basename(f)[7:]) for f in glob.glob(os.path.join(path, "config-*")))
+
+#load_metrics: columns of a run as read-only memory maps
+def load_metrics(path, config=0):
+    folder = os.path.join(path, "config-{}".format(config))
+    n = _rows(folder)
+    if n == 0:
+        return {name: np.zeros(0, dtype) for name, dtype in COLUMNS}
+    return {name: np.memmap(_file(folder, name), dtype, mode="r", shape=(n,)) for name, dtype in COLUMNS}
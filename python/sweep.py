@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:20:48 2026
+
+@author: beacr
+"""
+
+# Hyperparameter sweeps: every configuration of a grid of (layers, dim, batch_size, lr, seed) is trained in
+# its own worker process, with a limited number of threads per worker; failures are recorded, not raised.
+# The results of a sweep go to a single store folder: one JSON-lines record per configuration in
+# <store>/sweep.jsonl and the per-iteration metrics in the binary columns of store.py (by config id).
+#
+#   results = run_sweep("HighDimensionSmooth", {"layers": [1, 2, 3], "dim": [2, 5, 7]}, 20000, "high/p1/sweep")
+#   m = load_metrics("high/p1/sweep", results[0]["id"])
+
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+import traceback
+
+import numpy as np
+
+from store import MetricsWriter, load_metrics
+
+# values used for the keys missing from the grid
+DEFAULTS = {"layers": 3, "dim": 2, "batch_size": 64, "lr": 0.001, "seed": 0}
+
+#configurations: cartesian product of the grid, as a list of dictionaries with an id
+def configurations(grid):
+    keys = list(DEFAULTS)
+    values = [grid.get(k, [DEFAULTS[k]]) for k in keys]
+    return [dict(zip(keys, v), id=i) for i, v in enumerate(itertools.product(*values))]
+
+#_init_worker: the thread limits must be set before tensorflow is imported in the worker
+def _init_worker(threads):
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+#run_config: trains one configuration in a fresh graph, streaming its metrics to the store, and returns
+#            its record; dim is the third argument of the problem class (dimension d, or refn for the
+#            2D problems); with a checkpoint directory the run is checkpointed and resumed from <checkpoint>/<id>;
+#            with `control` (keyword arguments of control.Controller) the run can stop before `iterations`
+def run_config(problem, config, iterations, store, threads=1, options=None, checkpoint=None, control=None):
+    record = {"id": config["id"], "problem": problem, "config": config, "iterations": iterations}
+    t0 = time.time()
+    try:
+        import tensorflow as tf
+        import problems
+        from checkpoint import Checkpointer, resume
+        from control import Controller
+
+        tf.reset_default_graph()
+        tf.set_random_seed(config["seed"])
+        np.random.seed(config["seed"])
+        npde = getattr(problems, problem)(config["batch_size"], config["layers"], config["dim"],
+                                          lr=config["lr"], **(options or {}))
+        session_config = tf.ConfigProto(intra_op_parallelism_threads=threads, inter_op_parallelism_threads=1)
+        path = None if checkpoint is None else os.path.join(checkpoint, str(config["id"]))
+        ctl = None if control is None else Controller(npde, verbose=False, **control)
+        ckpt = None if path is None else Checkpointer(npde, path, controller=ctl)
+        with tf.Session(config=session_config) as sess:
+            sess.run(npde.init)
+            start = 0 if path is None else resume(npde, sess, path, ctl)
+            writer = MetricsWriter(store, config["id"], start)
+            for i in range(start, iterations):
+                if i % 1000 == 0:
+                    print("[{}] {} {}: step {}".format(config["id"], problem, config, i))
+                npde.train(sess, i)
+                writer.record(npde, i)
+                stop = ctl is not None and ctl.step(sess, i)
+                if ckpt is not None and ckpt.step(sess, i):
+                    writer.flush()      # the rows up to the checkpoint survive a crash
+                if stop:
+                    break
+            writer.close()
+        if ckpt is not None:
+            ckpt.close()
+        rbloss, rl2 = getattr(npde, "rbloss", None), getattr(npde, "rl2", None)     # not recorded by NNPDE
+        record.update(status="ok", bloss=float(rbloss[-1]) if rbloss else None, loss=float(npde.rloss[-1]),
+                      l2=float(rl2[-1]) if rl2 else None, steps=len(npde.rloss),
+                      stopped=None if ctl is None else ctl.reason)
+    except Exception:
+        record.update(status="failed", error=traceback.format_exc())
+    record["time"] = time.time() - t0
+    return record
+
+def _run(args):
+    return run_config(*args)
+
+#run_sweep: runs all the configurations of the grid with `workers` processes of `threads` threads each,
+#           appending every record to <store>/sweep.jsonl as soon as it is available; returns the records by id
+def run_sweep(problem, grid, iterations, store, workers=None, threads=1, options=None, checkpoint=None,
+              control=None):
+    configs = configurations(grid)
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads)
+    os.makedirs(store, exist_ok=True)
+    ctx = mp.get_context("spawn")
+    records = []
+    with ctx.Pool(min(workers, len(configs)), initializer=_init_worker, initargs=(threads,),
+                  maxtasksperchild=1) as pool, open(os.path.join(store, "sweep.jsonl"), "a") as file:
+        for record in pool.imap_unordered(_run, [(problem, c, iterations, store, threads, options, checkpoint,
+                                                  control) for c in configs]):
+            if record["status"] != "ok":
+                print("[{}] failed:\n{}".format(record["id"], record["error"]))
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+            records.append(record)
+    return sorted(records, key=lambda r: r["id"])
+
+#load_results: records of a store by id, optionally only those of a problem; a sweep run again into the same
+#              store appends new records, only the last one of every (problem, id) is kept
+def load_results(store, problem=None):
+    records = {}
+    with open(os.path.join(store, "sweep.jsonl")) as file:
+        for line in file:
+            if line.strip():
+                r = json.loads(line)
+                records[r["problem"], r["id"]] = r
+    return [r for _, r in sorted(records.items()) if problem is None or r["problem"] == problem]
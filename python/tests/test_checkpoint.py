@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from checkpoint import Checkpointer, resume
+from control import Controller, PlateauLR
+from problems import HighDimensionSmooth, Problem1_BD
+
+
+def run(cls, third, path, iterations):
+    tf.reset_default_graph()
+    tf.set_random_seed(0)
+    np.random.seed(0)
+    npde = cls(16, 2, third, l2_every=3)
+    ctl = Controller(npde, PlateauLR(patience=2, threshold=0.5), verbose=False)
+    ckpt = Checkpointer(npde, path, every=2, controller=ctl)
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        for i in range(resume(npde, sess, path, ctl), iterations):
+            npde.train(sess, i)
+            ctl.step(sess, i)
+            ckpt.step(sess, i)
+    ckpt.close()
+    npde.sampler.close()
+    return npde, ctl
+
+
+@pytest.mark.parametrize("cls, third", [(Problem1_BD, 10), (HighDimensionSmooth, 3)])
+def test_resume_reproduces_run(cls, third, tmp_path):
+    full, full_ctl = run(cls, third, str(tmp_path / "full"), 8)
+    run(cls, third, str(tmp_path / "split"), 4)                       # interrupted after iteration 3
+    resumed, resumed_ctl = run(cls, third, str(tmp_path / "split"), 8)
+    assert len(resumed.rloss) == 8
+    np.testing.assert_array_equal(resumed.rloss, full.rloss)
+    np.testing.assert_array_equal(resumed.rbloss, full.rbloss)
+    np.testing.assert_array_equal(resumed.rl2, full.rl2)
+    assert resumed.rl2_iter == full.rl2_iter
+    assert resumed_ctl.rlr == full_ctl.rlr and resumed_ctl.best == full_ctl.best
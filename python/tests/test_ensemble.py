@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from problems import HighDimensionPeak, ProblemPeak_BD
+
+
+@pytest.mark.parametrize("cls, third", [(ProblemPeak_BD, 10), (HighDimensionPeak, 3)])
+def test_ensemble_trains(cls, third):
+    tf.reset_default_graph()
+    tf.set_random_seed(0)
+    np.random.seed(0)
+    npde = cls(16, 2, third, ensemble=2, lrs=[1e-3, 1e-4], l2_every=2)
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        for i in range(4):
+            npde.train(sess, i)
+        _, X = npde.sampler.next(sess)
+        losses, loss, residual = sess.run([npde.losses, npde.loss, npde.residual()], feed_dict={npde.x: X})
+    npde.sampler.close()
+    assert np.shape(npde.rloss_members) == (4, 2) and np.shape(npde.rl2_members) == (2, 2)
+    np.testing.assert_allclose(np.sum(npde.rloss_members, axis=1), npde.rloss)
+    # member losses from the clipped residual of the training loss
+    np.testing.assert_allclose(losses.sum(), loss)
+    np.testing.assert_allclose(losses, np.sum(residual.reshape((2, -1)) ** 2, axis=1))
+    assert np.abs(residual).max() <= 2e2
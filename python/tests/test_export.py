@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+import export
+import problems
+
+
+class Subclass(problems.Problem1_BD):
+    def B(self, x):
+        return 2 * super().B(x)
+
+
+@pytest.mark.parametrize("name", sorted(n for n in export.LIFTS if n != "NNPDE2"))
+def test_parity(name, tmp_path):
+    tf.reset_default_graph()
+    tf.set_random_seed(0)
+    cls = getattr(problems, name)
+    third = 3 if name.startswith("HighDimension") else 10
+    npde = cls(16, 2, third)
+    X = np.random.RandomState(0).rand(200, getattr(npde, "d", 2))
+    path = str(tmp_path / "model.npz")
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        u = sess.run(npde.u, feed_dict={npde.x: X})
+        export.export(npde, sess, path)
+    if hasattr(npde, "sampler"):
+        npde.sampler.close()
+    np.testing.assert_allclose(export.load(path)(X, chunk=64), u, rtol=1e-10, atol=1e-12)
+
+
+def test_unregistered_subclass(tmp_path):
+    tf.reset_default_graph()
+    npde = Subclass(16, 2, 10)
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        with pytest.raises(ValueError):
+            export.export(npde, sess, str(tmp_path / "model.npz"))
+    npde.sampler.close()
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from problems import HighDimensionSmooth, Problem1_BD
+
+
+def histories(cls, third, fused, steps=6):
+    tf.reset_default_graph()
+    tf.set_random_seed(0)
+    np.random.seed(0)
+    npde = cls(16, 2, third, fused=fused, l2_every=2)
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        for i in range(steps):
+            npde.train(sess, i)
+    npde.sampler.close()
+    return npde
+
+
+@pytest.mark.parametrize("cls, third", [(Problem1_BD, 10), (HighDimensionSmooth, 3)])
+def test_fused_matches_unfused(cls, third):
+    fused = histories(cls, third, True)
+    plain = histories(cls, third, False)
+    np.testing.assert_allclose(fused.rbloss, plain.rbloss, rtol=1e-8)
+    np.testing.assert_allclose(fused.rloss, plain.rloss, rtol=1e-8)
+    assert fused.rl2_iter == plain.rl2_iter == [0, 2, 4]
+    np.testing.assert_allclose(fused.rl2, plain.rl2, rtol=1e-8)
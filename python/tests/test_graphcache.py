@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+import inference
+from pdebase import compute_delta_forward, compute_delta_nd
+from problems import HighDimensionSmooth, Problem1_BD
+
+
+def construct(cls, folder, *args, seed=0, **kwargs):
+    tf.reset_default_graph()
+    tf.set_random_seed(seed)
+    return cls(*args, l2_every=10 ** 9, cache=folder, **kwargs)
+
+
+def test_seed_in_key(tmp_path):
+    construct(HighDimensionSmooth, str(tmp_path), 16, 2, 3, seed=0).sampler.close()
+    construct(HighDimensionSmooth, str(tmp_path), 16, 2, 3, seed=1).sampler.close()
+    assert len([f for f in os.listdir(str(tmp_path)) if f.endswith(".json")]) == 2
+
+
+def test_restored_forward_laplacian(tmp_path):
+    construct(HighDimensionSmooth, str(tmp_path), 16, 2, 3).sampler.close()
+    npde = construct(HighDimensionSmooth, str(tmp_path), 16, 2, 3)      # restored from the cache
+    assert not hasattr(npde, "optimizer1")
+    forward = compute_delta_forward(npde, npde.x)
+    reverse = compute_delta_nd(npde.u, npde.x, 3)
+    X = np.random.RandomState(0).rand(32, 3)
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        f, r = sess.run([forward, reverse], feed_dict={npde.x: X})
+    npde.sampler.close()
+    np.testing.assert_allclose(f, r, rtol=1e-8, atol=1e-10)
+
+
+def test_restored_inference(tmp_path):
+    construct(Problem1_BD, str(tmp_path), 16, 2, 10, laplacian="forward").sampler.close()
+    npde = construct(Problem1_BD, str(tmp_path), 16, 2, 10, laplacian="forward")
+    assert not hasattr(npde, "optimizer1")
+    X = np.random.RandomState(0).rand(100, 2)
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        res = npde.evaluate(sess, X, fields=("u", "delta"), chunk=32)
+        u, delta = sess.run([npde.u, inference.field_tensor(npde, "delta")], feed_dict={npde.x: X})
+    npde.sampler.close()
+    np.testing.assert_allclose(res[:, 0], u)
+    np.testing.assert_allclose(res[:, 1], delta)
+
+
+def test_module_sources_in_key(tmp_path, monkeypatch):
+    import graphcache
+
+    module = tmp_path / "graph_helpers.py"
+    module.write_text("WIDTH = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(graphcache, "MODULES", graphcache.MODULES + ("graph_helpers",))
+    tf.reset_default_graph()
+    npde = object.__new__(HighDimensionSmooth)
+    key = graphcache.cache_key(npde, {})
+    assert graphcache.cache_key(npde, {}) == key
+    module.write_text("WIDTH = 2\n")
+    assert graphcache.cache_key(npde, {}) != key
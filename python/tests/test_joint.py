@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from problems import HighDimensionSmooth, Problem1_BD
+
+
+@pytest.mark.parametrize("cls, third", [(Problem1_BD, 10), (HighDimensionSmooth, 3)])
+@pytest.mark.parametrize("weighting", ["fixed", "gradnorm", "learned"])
+def test_joint_trains(cls, third, weighting):
+    tf.reset_default_graph()
+    tf.set_random_seed(0)
+    np.random.seed(0)
+    npde = cls(16, 2, third, joint=True, weighting=weighting, balance_every=2)
+    assert not hasattr(npde, "opt1") and not hasattr(npde, "opt2")
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        for i in range(5):
+            npde.train(sess, i)
+        weight = sess.run(npde.bweight)
+    npde.sampler.close()
+    assert len(npde.rloss) == len(npde.rbloss) == 5
+    assert np.all(np.isfinite(npde.rloss)) and np.all(np.isfinite(npde.rbloss)) and np.isfinite(weight)
+
+
+def test_joint_excludes_fused():
+    tf.reset_default_graph()
+    with pytest.raises(ValueError):
+        HighDimensionSmooth(16, 2, 3, joint=True, fused=True)
@@ -0,0 +1,36 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+import problems
+from profiling import Profiler
+
+# class, third constructor argument, options, phases timed at every iteration
+CASES = [("ProblemPeak", 10, {}, {"sampling", "opt"}),
+         ("Problem1_BD", 10, {}, {"sampling", "bloss", "opt2", "rl2"}),
+         ("Problem1_BD", 10, {"fused": True}, {"sampling", "fused"}),
+         ("HighDimensionSmooth", 3, {"joint": True}, {"sampling", "joint"}),
+         ("HighDimensionSmooth", 3, {"l2_every": 1}, {"sampling", "bloss", "opt2", "rl2"})]
+
+
+@pytest.mark.parametrize("name, third, options, phases", CASES)
+def test_phases_timed(name, third, options, phases, tmp_path):
+    tf.reset_default_graph()
+    np.random.seed(0)
+    npde = getattr(problems, name)(16, 2, third, **options)
+    npde.profiler = Profiler(trace=[1], folder=str(tmp_path))
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        for i in range(3):
+            npde.train(sess, i)
+    if hasattr(npde, "sampler"):
+        npde.sampler.close()
+    summary = npde.profiler.summary()
+    npde.profiler.report()
+    for phase in phases:
+        assert summary[phase]["calls"] == 3
+    assert glob.glob(os.path.join(str(tmp_path), "trace-1-*.json"))
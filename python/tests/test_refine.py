@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from problems import HighDimensionSmooth, Problem1_BD
+from refine import METHODS, Refiner
+
+
+@pytest.mark.parametrize("cls, third", [(Problem1_BD, 10), (HighDimensionSmooth, 3)])
+@pytest.mark.parametrize("method", METHODS)
+def test_refiner_runs(cls, third, method):
+    tf.reset_default_graph()
+    tf.set_random_seed(0)
+    np.random.seed(0)
+    npde = cls(16, 1, third, l2_every=1)
+    refiner = Refiner(npde, method, batches=2, maxiter=3)
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        for i in range(3):
+            npde.train(sess, i)
+        loss = npde.rloss[-1]
+        results = refiner.run(sess, verbose=False)
+    npde.sampler.close()
+    assert set(results) == {"boundary", "inner"}
+    assert len(npde.rloss) > 3 and len(npde.rloss) == len(npde.rbloss)
+    assert np.all(np.isfinite(npde.rloss[3:])) and np.isfinite(loss)
+    assert all(np.isfinite(r.fun) for r in results.values())
@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+import pytest
+
+from render import Renderer
+
+
+class Grid:
+    def __init__(self, n=8):
+        self.X, self.Y = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n))
+        self.refX = np.column_stack([self.X.ravel(), self.Y.ravel()])
+        self.u = "u"
+        self.x = "x"
+
+    def exactsol(self, x, y):
+        return x * y
+
+
+class Session:
+    def run(self, u, feed_dict):
+        return feed_dict["x"][:, 0]
+
+
+def test_frames_written(tmp_path):
+    renderer = Renderer(Grid(), str(tmp_path))
+    renderer.snapshot(Session(), 3)
+    renderer.close()
+    assert os.path.exists(str(tmp_path / "snap-3.npy")) and os.path.exists(str(tmp_path / "fig3.png"))
+
+
+def test_worker_error_raised(tmp_path):
+    renderer = Renderer(Grid(), str(tmp_path), render=False)
+    renderer.folder = str(tmp_path / "missing")       # np.save fails in the worker
+    renderer.snapshot(Session(), 0)
+    with pytest.raises(RuntimeError, match="renderer failed"):
+        renderer.close()
+    with pytest.raises(RuntimeError, match="renderer failed"):
+        renderer.snapshot(Session(), 1)
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from problems import HighDimensionSmooth, ProblemPeak_BD
+from sampling import AdaptiveSampler
+
+
+@pytest.mark.parametrize("cls, third", [(ProblemPeak_BD, 10), (HighDimensionSmooth, 3)])
+def test_adaptive_sampler_keeps_extra_points(cls, third):
+    tf.reset_default_graph()
+    np.random.seed(0)
+    npde = cls(16, 2, third)
+    npde.sampler.close()
+    npde.sampler = AdaptiveSampler(npde, pool=256, every=2, uniform=0.5, chunk=100)
+    extra = npde.extra_points()
+    with tf.Session() as sess:
+        sess.run(npde.init)
+        for i in range(4):
+            bX, X = npde.sampler.next(sess)
+            assert len(X) == 16 + (0 if extra is None else len(extra))
+            if extra is not None:
+                np.testing.assert_array_equal(X[16:], extra)
+            assert np.all((X >= 0) & (X <= 1))
+            npde.train(sess, i)
+    assert npde.sampler.p is not None and len(npde.rloss) == 4
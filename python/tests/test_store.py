@@ -0,0 +1,35 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from store import MetricsWriter, load_metrics
+
+
+#write: rows start..stop-1 flushed at flush_at, then a crash: the buffered rows are lost
+def write(path, start, stop, flush_at=None):
+    writer = MetricsWriter(path, 0, start)
+    for i in range(start, stop):
+        writer.append(i, 1.0, 2.0)
+        if i == flush_at:
+            writer.flush()
+    for file in writer.files.values():
+        file.close()
+
+
+def test_resume_after_flush(tmp_path):
+    path = str(tmp_path)
+    write(path, 0, 8, flush_at=4)           # checkpoint at iteration 4, crash at 7
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        MetricsWriter(path, 0, 5).close()
+    np.testing.assert_array_equal(load_metrics(path, 0)["iteration"], np.arange(5))
+    write(path, 5, 10, flush_at=9)
+    np.testing.assert_array_equal(load_metrics(path, 0)["iteration"], np.arange(10))
+
+
+def test_warns_on_lost_rows(tmp_path):
+    path = str(tmp_path)
+    write(path, 0, 8, flush_at=2)
+    with pytest.warns(UserWarning, match="lost"):
+        MetricsWriter(path, 0, 5).close()